@@ -6,8 +6,9 @@ from app.models.user import User
 
 from app.database import get_db
 from app.schemas.auth import LoginRequest, RegisterRequest, Token
-from app.auth import create_access_token, get_password_hash, verify_password, pwd_context
+from app.auth import create_access_token, get_password_hash_async, verify_password_async, pwd_context
 from app.services.users import get_user_by_username, create_user
+from app.services.user_cache import invalidate_user, user_cache
 
 router = APIRouter()
 
@@ -27,19 +28,24 @@ async def login(
     db: AsyncSession = Depends(get_db),
 ):
     user = await get_user_by_username(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Niepoprawny login lub hasło",
         )
 
     if pwd_context.needs_update(user.hashed_password):
-        user.hashed_password = get_password_hash(form_data.password)
+        user.hashed_password = await get_password_hash_async(form_data.password)
         await db.commit()
+        await invalidate_user(user.username)
 
     token = create_access_token(data={"sub": user.username})
     return Token(access_token=token, token_type="bearer")
 
 @router.get("/me")
 async def me(current_user: User = Depends(get_current_user)):
-    return {"id": current_user.id, "username": current_user.username}
\ No newline at end of file
+    return {"id": current_user.id, "username": current_user.username}
+
+@router.get("/cache-stats")
+async def user_cache_stats(current_user: User = Depends(get_current_user)):
+    return user_cache.stats()
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.database import get_db
 from app.models.dock import Dock
 from app.schemas.dock import DockCreate, DockResponse
+from app.schemas.shipment import DockAssignmentItem, DockAssignmentPlan
+from app.schemas.pallet import PalletEventResponse
 from app.redis_client import redis_client
 from app.models.shipment import Shipment
+from app.services.audit_snapshots import mark_audit_stale
+from app.services.events import publish_event
+from app.services.dock_cache import get_cached_docks, invalidate_docks
+from app.services.dock_assignment import assign_pending_shipments
+from app.services.pallet_events import get_dock_history, history_window
 
 
 router = APIRouter()
@@ -22,19 +31,45 @@ async def create_dock(dock_data: DockCreate, db: AsyncSession = Depends(get_db))
     db.add(new_dock)
     await db.commit()
     await db.refresh(new_dock)
+    await invalidate_docks(new_dock)
+    await mark_audit_stale()
     return new_dock
 
 @router.get("/", response_model=list[DockResponse], tags=["Docks"])
 async def get_docks(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Dock))
-    return result.scalars().all()
+    # Stan ramp z cache Redis (odpytywany non-stop przez dashboard i plac)
+    return await get_cached_docks(db)
+
+
+# Przydział wszystkich oczekujących tras do wolnych ramp naraz (typ rampy + priorytet)
+@router.post("/auto-assign", response_model=DockAssignmentPlan, tags=["Docks"])
+async def auto_assign_docks(dry_run: bool = False, db: AsyncSession = Depends(get_db)):
+    plan, compute_ms = await assign_pending_shipments(db, dry_run=dry_run)
+    return DockAssignmentPlan(
+        applied=not dry_run and bool(plan.pairs),
+        assignments=[
+            DockAssignmentItem(
+                dock_number=dock.number,
+                dock_type=dock.dock_type,
+                shipment_id=shipment.id,
+                reference_number=shipment.reference_number,
+                required_dock_type=shipment.required_dock_type,
+                priority=shipment.priority,
+            )
+            for dock, shipment in plan.pairs
+        ],
+        unassigned_shipments=[shipment.reference_number for shipment in plan.unassigned],
+        free_docks_left=[dock.number for dock in plan.free_docks],
+        compute_ms=round(compute_ms, 3),
+    )
 
 
 @router.patch("/{dock_number}/assign-shipment/{ref_number}", tags=["Docks"])
 async def assign_shipment_to_dock(dock_number: str, ref_number: str, db: AsyncSession = Depends(get_db)):
-    # 1. Pobierz rampę i trasę
-    dock_query = select(Dock).where(Dock.number == dock_number)
-    shipment_query = select(Shipment).where(Shipment.reference_number == ref_number)
+    # 1. Pobierz rampę i trasę FOR UPDATE (kolejność jak w auto-przydziale: rampa, potem trasa) -
+    #    równoległe przypisania tej samej rampy lub trasy czekają na nasz commit
+    dock_query = select(Dock).where(Dock.number == dock_number).with_for_update()
+    shipment_query = select(Shipment).where(Shipment.reference_number == ref_number).with_for_update()
     
     dock = (await db.execute(dock_query)).scalar_one_or_none()
     shipment = (await db.execute(shipment_query)).scalar_one_or_none()
@@ -42,13 +77,41 @@ async def assign_shipment_to_dock(dock_number: str, ref_number: str, db: AsyncSe
     if not dock or not shipment:
         raise HTTPException(status_code=404, detail="Rampa lub Trasa nie istnieje")
 
-    # 2. Sprawdź, czy rampa nie jest już zajęta przez inną trasę
+    # 2. Sprawdź (już pod blokadą), czy rampa nie jest zajęta przez inną trasę
     if dock.is_occupied and dock.current_shipment_id != shipment.id:
         raise HTTPException(status_code=400, detail="Rampa jest już zajęta przez inną trasę!")
 
+    # ... i czy trasa nie stoi już na innej rampie (zapytanie po blokadzie widzi zatwierdzone przypisania)
+    other_dock_query = select(Dock.number).where(Dock.current_shipment_id == shipment.id, Dock.id != dock.id)
+    other_dock = (await db.execute(other_dock_query)).scalars().first()
+    if other_dock:
+        raise HTTPException(status_code=400, detail=f"Trasa jest już przypisana do rampy {other_dock}!")
+
     # 3. Połącz trasę z rampą
     dock.current_shipment_id = shipment.id
     dock.is_occupied = True
 
     await db.commit()
-    return {"message": f"Trasa {ref_number} została przypisana do rampy {dock_number}"}
\ No newline at end of file
+    await invalidate_docks(dock)
+    await mark_audit_stale()
+    await publish_event(
+        "dock.assigned",
+        dock_number=dock.number,
+        shipment_id=shipment.id,
+        reference_number=shipment.reference_number,
+    )
+    return {"message": f"Trasa {ref_number} została przypisana do rampy {dock_number}"}
+
+# Historia palet przechodzących przez rampę (np. do analizy czasu postoju)
+@router.get("/{dock_number}/history", response_model=list[PalletEventResponse], tags=["Docks"])
+async def get_dock_events(
+    dock_number: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+):
+    since, until = history_window(since, until)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="Parametr since musi być wcześniejszy niż until")
+    return await get_dock_history(db, dock_number, since, until, limit)
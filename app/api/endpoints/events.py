@@ -0,0 +1,57 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from app.services.events import event_broadcaster, event_matches, read_events_after, stream_id_after
+
+router = APIRouter()
+
+KEEPALIVE_SECONDS = 15
+
+
+def _format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+# Zmiany stanu ramp, palet i tras na żywo (SSE); opcjonalny filtr po numerze rampy lub trasie
+@router.get("/stream", tags=["Events"])
+async def stream_events(
+    request: Request,
+    dock: Optional[str] = None,
+    shipment: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    queue = event_broadcaster.subscribe()
+
+    async def events():
+        try:
+            last_seen = last_event_id
+            # Po zerwaniu połączenia przeglądarka wysyła Last-Event-ID - doczytujemy zaległe zdarzenia
+            if last_event_id:
+                for event in await read_events_after(last_event_id):
+                    last_seen = event["id"]
+                    if event_matches(event, dock, shipment):
+                        yield _format_sse(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if last_seen and not stream_id_after(event["id"], last_seen):
+                    continue
+                if event_matches(event, dock, shipment):
+                    yield _format_sse(event)
+        finally:
+            event_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
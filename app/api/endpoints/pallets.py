@@ -1,117 +1,248 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from app.deps import get_current_user
 from app.models.user import User
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from app.database import get_db
 from app.models.pallet import Pallet
-from app.models.dock import Dock
-from app.models.shipment import Shipment
-from app.schemas.pallet import PalletCreate, PalletResponse, PalletScanToDock
-from app.redis_client import redis_client
-from app.services.ai_engine import ai_engine
+from app.schemas.pallet import (
+    PalletCreate,
+    PalletResponse,
+    PalletScanToDock,
+    PalletBatchScanToDock,
+    PalletBulkCreate,
+    PalletBulkItemResult,
+    BulkItemStatus,
+    PalletEventResponse,
+)
+from app.services.ai_engine import AIOverloadedError
+from app.services.ai_cache import get_pallet_check
+from app.services.idempotency import (
+    IDEMPOTENCY_HEADER,
+    claim_many,
+    fingerprint,
+    idempotency_key as idempotency_key_for,
+    release_many,
+    run_idempotent,
+    store_many,
+    stored_results,
+)
+from app.services.events import publish_event, publish_events
+from app.services.pagination import SortOrder, paginate, stream_ndjson
+from app.services.pallet_events import get_pallet_history, history_window
+from app.services.scanning import scan_pallet_to_dock, scan_pallets_to_dock
 
 router = APIRouter()
 
 # Używamy @router zamiast @app
 @router.post("/", response_model=PalletResponse, tags=["Pallets"])
-async def create_pallet(pallet_data: PalletCreate, db: AsyncSession = Depends(get_db)):
-# --- LOGIKA REDIS (Ochrona przed Wi-Fi lags) ---
-    redis_key = f"scan_lock:{pallet_data.barcode}"
-    
-    # Próbujemy ustawić klucz w Redisie na 10 sekund (NX = set if not exists)
-    is_new_scan = await redis_client.set(redis_key, "locked", ex=10, nx=True)
-    
-    if not is_new_scan:
-        # Jeśli klucz już był, to znaczy że to duplikat wysłany przez skaner
-        raise HTTPException(status_code=400, detail="Duplicate scan detected. Please wait.")
+async def create_pallet(
+    pallet_data: PalletCreate,
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+):
+    # --- IDEMPOTENCJA (Ochrona przed Wi-Fi lags) ---
+    # Ponowiony skan dostaje pierwszą odpowiedź z Redisa, bez zapytań do bazy
+    async def handler():
+        query = select(Pallet).where(Pallet.barcode == pallet_data.barcode)
+        result = await db.execute(query)
+        existing_pallet = result.scalar_one_or_none()
 
-    query = select(Pallet).where(Pallet.barcode == pallet_data.barcode)
-    result = await db.execute(query)
-    existing_pallet = result.scalar_one_or_none()
-    
-    if existing_pallet:
-        raise HTTPException(status_code=400, detail="Barcode already scanned!")
+        if existing_pallet:
+            raise HTTPException(status_code=400, detail="Barcode already scanned!")
+
+        # 2. Stwórz nową paletę
+        new_pallet = Pallet(
+            barcode=pallet_data.barcode,
+            weight=pallet_data.weight
+        )
+
+        db.add(new_pallet)
+        await db.commit() # Tu fizycznie dane lecą do Postgresa
+        await db.refresh(new_pallet) # Pobieramy wygenerowane ID i datę
+        await publish_event(
+            "pallet.created",
+            pallet_id=new_pallet.id,
+            barcode=new_pallet.barcode,
+            status=new_pallet.status,
+            weight=new_pallet.weight,
+        )
+        return PalletResponse.model_validate(new_pallet)
 
-    # 2. Stwórz nową paletę
-    new_pallet = Pallet(
-        barcode=pallet_data.barcode,
-        weight=pallet_data.weight
+    return await run_idempotent(
+        key=idempotency_key_for("pallet.create", idempotency_key, pallet_data.barcode, pallet_data.weight),
+        request_fingerprint=fingerprint(pallet_data.barcode, pallet_data.weight),
+        handler=handler,
+        explicit_key=idempotency_key is not None,
     )
-    
-    db.add(new_pallet)
-    await db.commit() # Tu fizycznie dane lecą do Postgresa
-    await db.refresh(new_pallet) # Pobieramy wygenerowane ID i datę
-    
-    return new_pallet
-    pass 
+
+@router.post("/bulk", response_model=list[PalletBulkItemResult], tags=["Pallets"])
+async def create_pallets_bulk(payload: PalletBulkCreate, db: AsyncSession = Depends(get_db)):
+    items = payload.pallets
+    first_items = {}
+    for item in items:
+        first_items.setdefault(item.barcode, item)
+    unique_barcodes = list(first_items)
+
+    # 1. REDIS: te same klucze idempotencji co POST /pallets/ (kod + waga) - pojedynczy skan i paczka
+    #    widzą nawzajem trwające skany i powtarzają te same wyniki; SET NX jednym pipeline
+    keys = {
+        barcode: idempotency_key_for("pallet.create", None, barcode, first_items[barcode].weight)
+        for barcode in unique_barcodes
+    }
+    claimed = await claim_many([keys[barcode] for barcode in unique_barcodes])
+    locked = [barcode for barcode, acquired in zip(unique_barcodes, claimed) if acquired]
+    busy = [barcode for barcode, acquired in zip(unique_barcodes, claimed) if not acquired]
+
+    # Skan już obsłużony w oknie idempotencji - powtarzamy zapisaną paletę jak przy pojedynczym skanie
+    replayed = {}
+    for barcode, stored in zip(busy, await stored_results([keys[barcode] for barcode in busy])):
+        item = first_items[barcode]
+        if stored and stored["status_code"] == 200 and stored["fingerprint"] == fingerprint(barcode, item.weight):
+            replayed[barcode] = PalletResponse.model_validate(stored["body"])
+
+    created = {}
+    try:
+        # 2. Jedno zapytanie o istniejące kody: WHERE barcode = ANY(:barcodes)
+        existing = set()
+        if locked:
+            query = select(Pallet.barcode).where(
+                Pallet.barcode == any_(bindparam("barcodes", locked, type_=ARRAY(String)))
+            )
+            existing = set((await db.execute(query)).scalars().all())
+
+        # 3. Jeden wielowierszowy INSERT; ON CONFLICT łapie wyścig ze skanem z innym kluczem (inna waga)
+        rows = [
+            {"barcode": barcode, "weight": first_items[barcode].weight}
+            for barcode in locked
+            if barcode not in existing
+        ]
+        if rows:
+            stmt = (
+                pg_insert(Pallet)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[Pallet.barcode])
+                .returning(Pallet)
+            )
+            created = {pallet.barcode: pallet for pallet in (await db.scalars(stmt)).all()}
+            await db.commit()
+    except BaseException:
+        # Jak w run_idempotent: błąd serwera nie zostawia wyników, ponowienie wykona skany od nowa
+        await release_many([keys[barcode] for barcode in locked])
+        raise
+
+    # Sukcesy utrwalamy jak pojedynczy skan, odrzucenia (kod już w bazie) zwalniamy - zależą od stanu
+    await store_many([
+        (keys[barcode], fingerprint(barcode, pallet.weight), jsonable_encoder(PalletResponse.model_validate(pallet)))
+        for barcode, pallet in created.items()
+    ])
+    await release_many([keys[barcode] for barcode in locked if barcode not in created])
+    await publish_events("pallet.created", [
+        {"pallet_id": pallet.id, "barcode": pallet.barcode, "status": pallet.status, "weight": pallet.weight}
+        for pallet in created.values()
+    ])
+
+    # 4. Wynik dla każdej pozycji w kolejności z żądania
+    results = []
+    seen = set()
+    locked_set = set(locked)
+    for item in items:
+        if item.barcode in seen or (item.barcode not in locked_set and item.barcode not in replayed):
+            results.append(PalletBulkItemResult(
+                barcode=item.barcode,
+                status=BulkItemStatus.DUPLICATE_SCAN,
+                detail="Duplicate scan detected. Please wait.",
+            ))
+        elif item.barcode in created or item.barcode in replayed:
+            pallet = replayed.get(item.barcode) or PalletResponse.model_validate(created[item.barcode])
+            results.append(PalletBulkItemResult(
+                barcode=item.barcode,
+                status=BulkItemStatus.CREATED,
+                pallet=pallet,
+            ))
+        else:
+            results.append(PalletBulkItemResult(
+                barcode=item.barcode,
+                status=BulkItemStatus.ALREADY_EXISTS,
+                detail="Barcode already scanned!",
+            ))
+        seen.add(item.barcode)
+
+    return results
 
 @router.get("/user")
 async def list_shipments(current_user: User = Depends(get_current_user)):
     return {"ok": True, "user": current_user.username}
 
 @router.get("/", response_model=list[PalletResponse], tags=["Pallets"])
-async def get_all_pallets(db: AsyncSession = Depends(get_db)):
-    query = select(Pallet)
-    result = await db.execute(query)
-    return result.scalars().all()
+async def get_all_pallets(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    order: SortOrder = SortOrder.ASC,
+    db: AsyncSession = Depends(get_db),
+):
+    # Stronicowanie po (created_at, id); kursor następnej strony w nagłówku
+    pallets, next_cursor = await paginate(db, select(Pallet), Pallet, cursor, limit, order)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return pallets
+
+@router.get("/stream", tags=["Pallets"])
+async def stream_pallets(order: SortOrder = SortOrder.ASC):
+    # Cała tabela jako NDJSON - stałe zużycie pamięci niezależnie od liczby palet
+    return StreamingResponse(
+        stream_ndjson(select(Pallet), Pallet, PalletResponse, order),
+        media_type="application/x-ndjson",
+    )
 
 @router.post("/scan-to-dock", tags=["Pallets"])
-async def scan_to_dock(data: PalletScanToDock, db: AsyncSession = Depends(get_db)):
-    # REDIS LOCK (Zabezpieczenie przed szybkim dwuklikiem)
-    lock_key = f"scan_lock:{data.barcode}"
-    if not await redis_client.set(lock_key, "1", ex=5, nx=True):
-        raise HTTPException(status_code=400, detail="Skan tej palety jest już przetwarzany...")
-
-    # SQL LOCK (Blokujemy paletę do odczytu i zapisu)
-    pallet_query = select(Pallet).where(Pallet.barcode == data.barcode).with_for_update() # Dodaj with_for_update!
-    pallet_result = await db.execute(pallet_query)
-    pallet = pallet_result.scalar_one_or_none()
-
-    # Pobierz paletę i rampę
-    pallet_query = select(Pallet).where(Pallet.barcode == data.barcode)
-    pallet = (await db.execute(pallet_query)).scalar_one_or_none()
-
-    # SPRAWDZENIE: Czy paleta już jest na jakiejś rampie?
-    if pallet and pallet.current_dock_id is not None:
-        raise HTTPException(status_code=400, detail="Ta paleta została już przypisana do rampy!")
-
-    dock_query = select(Dock).where(Dock.number == data.dock_number)
-    dock = (await db.execute(dock_query)).scalar_one_or_none()
-
-    if not pallet or not dock:
-        raise HTTPException(status_code=404, detail="Paleta lub Rampa nie istnieje")
-
-    # Pobierz trasę przypisaną do tej rampy (jeśli rampa ma przypisany shipment_id)
-    if not dock.current_shipment_id:
-        raise HTTPException(status_code=400, detail="Rampa nie ma przypisanej aktywnej trasy")
-
-    shipment_query = select(Shipment).where(Shipment.id == dock.current_shipment_id)
-    shipment = (await db.execute(shipment_query)).scalar_one_or_none()
-
-    # Obliczamy sumę wag palet już przypisanych do tej trasy
-    weight_sum_query = select(func.sum(Pallet.weight)).where(Pallet.shipment_id == shipment.id)
-    current_weight = (await db.execute(weight_sum_query)).scalar() or 0
-    max_capacity = shipment.max_weight_capacity or 12000
-    new_total_weight = current_weight + (pallet.weight or 0)
-
-    if new_total_weight > max_capacity:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"PRZEŁADOWANIE! Obecna waga: {current_weight}kg, Nowa paleta: {pallet.weight}kg. Limit: {shipment.max_weight_capacity}kg"
-        )
+async def scan_to_dock(
+    data: PalletScanToDock,
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+):
+    # IDEMPOTENCJA: dwuklik/ponowienie czeka na wynik pierwszego skanu i dostaje tę samą odpowiedź
+    # Paleta + rampa + trasa jednym zapytaniem, przypisanie jednym UPDATE
+    return await run_idempotent(
+        key=idempotency_key_for("pallet.scan", idempotency_key, data.barcode, data.dock_number),
+        request_fingerprint=fingerprint(data.barcode, data.dock_number),
+        handler=lambda: scan_pallet_to_dock(db, data.barcode, data.dock_number),
+        explicit_key=idempotency_key is not None,
+    )
 
-    # 4. Jeśli waga OK -> Przypisz paletę
-    pallet.current_dock_id = dock.id
-    pallet.shipment_id = shipment.id # Przypisujemy paletę do trasy
-    pallet.status = "LOADING_TO_DOCK"
-    
-    await db.commit()
-    return {
-        "message": "Załadunek dozwolony", 
-        "current_total_weight": new_total_weight,
-        "capacity_left": shipment.max_weight_capacity - new_total_weight
-    }
+@router.post("/scan-to-dock/batch", tags=["Pallets"])
+async def scan_to_dock_batch(
+    data: PalletBatchScanToDock,
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+):
+    # Rząd palet na jedną rampę: jedna blokada, jedna kontrola wagi, jeden commit - wszystko albo nic
+    return await run_idempotent(
+        key=idempotency_key_for("pallet.scan_batch", idempotency_key, data.dock_number, *data.barcodes),
+        request_fingerprint=fingerprint(data.dock_number, *data.barcodes),
+        handler=lambda: scan_pallets_to_dock(db, data.barcodes, data.dock_number),
+        explicit_key=idempotency_key is not None,
+    )
+
+# Historia skanów palety; okno czasowe ogranicza zapytanie do kilku dziennych partycji
+@router.get("/{barcode}/history", response_model=list[PalletEventResponse], tags=["Pallets"])
+async def get_pallet_events(
+    barcode: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+):
+    since, until = history_window(since, until)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="Parametr since musi być wcześniejszy niż until")
+    return await get_pallet_history(db, barcode, since, until, limit)
 
 @router.get("/{barcode}/ai-check", tags=["Gen-AI"])
 async def ai_check_pallet(barcode: str, db: AsyncSession = Depends(get_db)):
@@ -123,14 +254,18 @@ async def ai_check_pallet(barcode: str, db: AsyncSession = Depends(get_db)):
     if not pallet:
         raise HTTPException(status_code=404, detail="Paleta nie znaleziona")
     
-    # 2. Wywołaj analizę AI (pobiera dane z modelu)
-    analysis = await ai_engine.analyze_pallet_safety(
-        barcode=pallet.barcode,
-        weight=pallet.weight or 0,
-        status=pallet.status
-    )
+    # 2. Analiza AI - z cache, jeśli paleta się nie zmieniła
+    try:
+        analysis, cached = await get_pallet_check(
+            barcode=pallet.barcode,
+            weight=pallet.weight or 0,
+            status=pallet.status
+        )
+    except AIOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     
     return {
         "barcode": barcode,
-        "ai_analysis": analysis
+        "ai_analysis": analysis,
+        "cached": cached
     }
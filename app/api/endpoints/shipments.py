@@ -1,12 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from app.database import get_db
 from app.redis_client import redis_client
 from app.models.shipment import Shipment, ShipmentStatus
-from app.schemas.shipment import ShipmentCreate, ShipmentResponse
-from app.services.ai_engine import ai_engine
+from app.schemas.shipment import (
+    ShipmentCreate,
+    ShipmentResponse,
+    ShipmentLoadSummary,
+    LoadPlanItem,
+    LoadPlanResponse,
+    LoadPlanShipment,
+)
+from app.services.ai_engine import ai_engine, AIOverloadedError
 from app.models.dock import Dock
+from app.services.pagination import SortOrder, paginate, stream_ndjson
+from app.services.shipment_load import reconcile_load_counters
+from app.services.load_planning import plan_staged_pallets
+from app.services.audit_snapshots import get_job, get_latest_snapshot, mark_audit_stale, request_refresh
+from app.services.events import publish_event
+from app.services.dock_cache import invalidate_docks
 
 router = APIRouter()
 
@@ -45,13 +62,93 @@ async def create_shipment(data: ShipmentCreate, db: AsyncSession = Depends(get_d
     db.add(new_shipment)
     await db.commit()
     await db.refresh(new_shipment)
+    await mark_audit_stale()
     return new_shipment
 
 # Pobieranie listy wszystkich tras
 @router.get("/", response_model=list[ShipmentResponse], tags=["Shipments"])
-async def get_shipments(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Shipment))
-    return result.scalars().all()
+async def get_shipments(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    order: SortOrder = SortOrder.ASC,
+    db: AsyncSession = Depends(get_db),
+):
+    shipments, next_cursor = await paginate(db, select(Shipment), Shipment, cursor, limit, order)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return shipments
+
+# Załadunek wszystkich tras jednym zapytaniem - liczniki utrzymywane przy skanie, bez SUM po paletach
+@router.get("/load-summary", response_model=list[ShipmentLoadSummary], tags=["Shipments"])
+async def get_load_summary(
+    status: Optional[list[ShipmentStatus]] = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    fill_percent = func.round(
+        Shipment.loaded_weight * 100.0 / func.nullif(Shipment.max_weight_capacity, 0), 1
+    )
+    query = select(
+        Shipment.id,
+        Shipment.reference_number,
+        Shipment.origin,
+        Shipment.destination,
+        Shipment.status,
+        Shipment.pallet_count,
+        Shipment.loaded_weight,
+        Shipment.max_weight_capacity,
+        func.coalesce(fill_percent, 0).label("fill_percent"),
+    ).order_by(Shipment.created_at, Shipment.id)
+    if status:
+        query = query.where(Shipment.status.in_(status))
+
+    rows = (await db.execute(query)).all()
+    return [ShipmentLoadSummary.model_validate(row._mapping) for row in rows]
+
+# Plan rozłożenia palet STAGED na otwarte trasy (FFD po wadze) - przeładowania widać przed skanem
+@router.get("/load-plan", response_model=LoadPlanResponse, tags=["Shipments"])
+async def get_load_plan(db: AsyncSession = Depends(get_db)):
+    plan = await plan_staged_pallets(db)
+    references = [shipment.reference_number for shipment in plan.shipments]
+    shipments = []
+    for index, shipment in enumerate(plan.shipments):
+        loaded = shipment.loaded_weight or 0
+        planned = int(plan.planned_weight[index])
+        capacity = shipment.max_weight_capacity
+        shipments.append(LoadPlanShipment(
+            shipment_id=shipment.id,
+            reference_number=shipment.reference_number,
+            max_weight_capacity=capacity,
+            loaded_weight=loaded,
+            planned_weight=planned,
+            planned_pallets=int(plan.planned_pallets[index]),
+            fill_percent=round((loaded + planned) * 100 / capacity, 1) if capacity else 0,
+        ))
+
+    assignments, unplaced = [], []
+    for barcode, index in zip(plan.pallet_barcodes, plan.pallet_shipment.tolist()):
+        if index < 0:
+            unplaced.append(barcode)
+        else:
+            assignments.append(LoadPlanItem(barcode=barcode, reference_number=references[index]))
+
+    return LoadPlanResponse(
+        pallets_planned=len(assignments),
+        pallets_unplaced=len(unplaced),
+        shipments=shipments,
+        assignments=assignments,
+        unplaced_pallets=unplaced,
+        unweighed_pallets=plan.unweighed,
+        compute_ms=round(plan.compute_ms, 3),
+    )
+
+# Wszystkie trasy jako NDJSON (serwerowy kursor)
+@router.get("/stream", tags=["Shipments"])
+async def stream_shipments(order: SortOrder = SortOrder.ASC):
+    return StreamingResponse(
+        stream_ndjson(select(Shipment), Shipment, ShipmentResponse, order),
+        media_type="application/x-ndjson",
+    )
 
 # "Ghost Pickup Finder" - aktualizacja statusu (symulacja odbioru przez kogoś innego)
 @router.patch("/collect/{ref_number}", tags=["Shipments"])
@@ -64,21 +161,79 @@ async def mark_as_collected(ref_number: str, db: AsyncSession = Depends(get_db))
         
     shipment.status = ShipmentStatus.COLLECTED
     await db.commit()
+    await mark_audit_stale()
+    await publish_event(
+        "shipment.collected",
+        shipment_id=shipment.id,
+        reference_number=shipment.reference_number,
+        status=ShipmentStatus.COLLECTED.value,
+    )
     return {"message": f"Shipment {ref_number} marked as COLLECTED by another driver"}
 
+# Ostatni audyt wygenerowany w tle - odpowiedź natychmiast, bez czekania na LLM
 @router.get("/ai-audit", tags=["Gen-AI"])
-async def get_warehouse_audit(db: AsyncSession = Depends(get_db)):
-    docks = (await db.execute(select(Dock))).scalars().all()
-    shipments = (await db.execute(select(Shipment))).scalars().all()
-    report = await ai_engine.analyze_warehouse_state(docks, shipments)
-    
+async def get_warehouse_audit():
+    snapshot = await get_latest_snapshot()
+    if not snapshot:
+        # Kolejne odpytania przed pierwszym audytem dostają to samo zlecenie
+        job_id = await request_refresh(reuse_pending=True)
+        return JSONResponse(
+            status_code=202,
+            content={"message": "Audyt jest w przygotowaniu", "job_id": job_id},
+        )
+
     return {
-        "warehouse_health_check": report,
-        "timestamp": "Real-time from Llama3"
+        "warehouse_health_check": snapshot["warehouse_health_check"],
+        "timestamp": snapshot["generated_at"],
+        "trigger": snapshot["trigger"],
+        "model": snapshot["model"],
     }
 
+# Zlecenie odświeżenia audytu - zwraca job_id do odpytywania
+@router.post("/ai-audit/refresh", status_code=202, tags=["Gen-AI"])
+async def refresh_warehouse_audit():
+    job_id = await request_refresh()
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/ai-audit/jobs/{job_id}", tags=["Gen-AI"])
+async def get_warehouse_audit_job(job_id: str):
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Nie znaleziono zlecenia audytu")
+    return job
+
+# Naprawa liczników załadunku (loaded_weight / pallet_count) po ręcznych zmianach w bazie
+@router.post("/reconcile-load", tags=["Operations"])
+async def reconcile_load(db: AsyncSession = Depends(get_db)):
+    repaired = await reconcile_load_counters(db)
+    return {"repaired_count": len(repaired), "repaired": repaired}
+
+# Audyt AI jako Server-Sent Events - pierwsze słowa pojawiają się od razu, nie po całej generacji
+@router.get("/ai-audit/stream", tags=["Gen-AI"])
+async def stream_warehouse_audit(request: Request, db: AsyncSession = Depends(get_db)):
+    docks = (await db.execute(select(Dock))).scalars().all()
+    shipments = (await db.execute(select(Shipment))).scalars().all()
+
+    async def events():
+        try:
+            async for chunk in ai_engine.stream_warehouse_state(docks, shipments):
+                # Rozłączony klient -> wychodzimy z generatora, co zamyka strumień z modelu
+                if await request.is_disconnected():
+                    return
+                yield f"data: {json.dumps({'text': chunk}, ensure_ascii=False)}\n\n"
+        except AIOverloadedError as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)}, ensure_ascii=False)}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/{shipment_id}/release", tags=["Operations"])
-async def release_dock_and_start_transport(shipment_id: str, db: AsyncSession = Depends(get_db)):
+async def release_dock_and_start_transport(shipment_id: UUID, db: AsyncSession = Depends(get_db)):
     # 1. Pobierz trasę
     shipment = await db.get(Shipment, shipment_id)
     if not shipment:
@@ -98,4 +253,13 @@ async def release_dock_and_start_transport(shipment_id: str, db: AsyncSession =
     shipment.status = "SHIPPED"
 
     await db.commit()
+    await invalidate_docks(dock)
+    await mark_audit_stale()
+    await publish_event(
+        "dock.released",
+        dock_number=dock.number,
+        shipment_id=shipment.id,
+        reference_number=shipment.reference_number,
+        status=ShipmentStatus.SHIPPED.value,
+    )
     return {"status": "success", "message": f"Rampa {dock.number} zwolniona. Trasa {shipment.reference_number} w drodze."}
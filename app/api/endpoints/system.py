@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Query
+from app.database import engine
+from app.query_profiler import (
+    QUERY_PROFILER,
+    QUERY_PROFILER_DUPLICATES,
+    QUERY_PROFILER_THRESHOLD,
+    route_profiles,
+)
+from app.services.ai_engine import ai_engine
+
+router = APIRouter()
+
+# Diagnostyka kolejki do modelu AI (in-flight, głębokość kolejki, czasy oczekiwania)
+@router.get("/ai-stats", tags=["System"])
+async def get_ai_stats():
+    return ai_engine.stats()
+
+# Pula połączeń do Postgresa tego workera - do doboru pool_size / max_overflow
+@router.get("/db-pool", tags=["System"])
+async def get_db_pool_stats():
+    pool = engine.sync_engine.pool
+    return pool.telemetry.snapshot(pool)
+
+# Trasy z największą liczbą zapytań SQL wg profilera (tylko żądania profilowane w tym workerze)
+@router.get("/query-profile", tags=["System"])
+async def get_query_profile(limit: int = Query(20, ge=1, le=200)):
+    return {
+        "enabled_for_all_requests": QUERY_PROFILER,
+        "query_threshold": QUERY_PROFILER_THRESHOLD,
+        "duplicate_threshold": QUERY_PROFILER_DUPLICATES,
+        "routes": route_profiles.worst(limit),
+    }
+
+@router.delete("/query-profile", tags=["System"])
+async def reset_query_profile():
+    route_profiles.reset()
+    return {"message": "Statystyki profilera wyczyszczone"}
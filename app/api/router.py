@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from app.deps import get_current_user
-from app.api.endpoints import pallets, docks, shipments, auth
+from app.api.endpoints import pallets, docks, shipments, auth, system, events
 
 api_router = APIRouter(prefix="/api")
 
@@ -26,3 +26,15 @@ api_router.include_router(
     tags=["shipments"],
     dependencies=[Depends(get_current_user)],
 )
+api_router.include_router(
+    events.router,
+    prefix="/events",
+    tags=["events"],
+    dependencies=[Depends(get_current_user)],
+)
+api_router.include_router(
+    system.router,
+    prefix="/system",
+    tags=["system"],
+    dependencies=[Depends(get_current_user)],
+)
@@ -0,0 +1,33 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class DatabaseSettings(BaseSettings):
+    """Połączenie z Postgresem i pula połączeń - zmienne środowiskowe DB_* (lub .env)."""
+
+    model_config = SettingsConfigDict(env_prefix="DB_", env_file=".env", extra="ignore")
+
+    user: str = "user"
+    password: str = "password"
+    host: str = "127.0.0.1"
+    port: int = 5432
+    name: str = "logtech_platform"
+    echo: bool = False
+
+    # Pula połączeń - na worker (przy N workerach uvicorna do Postgresa idzie N * (pool_size + max_overflow))
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    # Domyślnie jak w SQLAlchemy; pre_ping to dodatkowy SELECT 1 przy każdym pobraniu połączenia -
+    # włączać (DB_POOL_PRE_PING=1, DB_POOL_RECYCLE=1800) tylko gdy coś po drodze zrywa bezczynne połączenia
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+
+    # Cache prepared statements asyncpg (0 przy pgbouncerze w trybie transaction)
+    statement_cache_size: int = 100
+
+    @property
+    def url(self) -> str:
+        return f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
+
+
+db_settings = DatabaseSettings()
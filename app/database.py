@@ -1,18 +1,20 @@
-import os
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
+from app.config import db_settings
+from app.db_pool import TimedQueuePool
 
-load_dotenv()
-
-DB_USER = os.getenv("DB_USER", "user")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
-DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("DB_NAME", "logtech_platform")
-
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-engine = create_async_engine(DATABASE_URL, echo=False)
+DATABASE_URL = db_settings.url
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=db_settings.echo,
+    poolclass=TimedQueuePool,
+    pool_size=db_settings.pool_size,
+    max_overflow=db_settings.max_overflow,
+    pool_timeout=db_settings.pool_timeout,
+    pool_recycle=db_settings.pool_recycle,
+    pool_pre_ping=db_settings.pool_pre_ping,
+    connect_args={"statement_cache_size": db_settings.statement_cache_size},
+)
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
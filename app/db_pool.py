@@ -0,0 +1,78 @@
+import os
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolTelemetry:
+    """Liczniki puli połączeń jednego workera: czasy oczekiwania, timeouty, wiek połączeń."""
+
+    def __init__(self, window: int = 1000):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=window)
+        self.connected_at: dict[int, float] = {}
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+        self.recent_waits.append(seconds)
+
+    def snapshot(self, pool) -> dict:
+        now = time.monotonic()
+        ages = [now - connected for connected in self.connected_at.values()]
+        recent = sorted(self.recent_waits)
+        return {
+            "worker_pid": os.getpid(),
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "checkouts_total": self.checkouts,
+            "timeouts_total": self.timeouts,
+            "wait_avg_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_p95_ms": round(recent[int(len(recent) * 0.95) - 1] * 1000, 3) if recent else 0.0,
+            "wait_max_ms": round(self.max_wait * 1000, 3),
+            "connections_open": len(ages),
+            "connection_age_avg_s": round(sum(ages) / len(ages), 1) if ages else 0.0,
+            "connection_age_max_s": round(max(ages), 1) if ages else 0.0,
+        }
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool, który mierzy czas oczekiwania na wolne połączenie."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "close", self._on_close)
+
+    def recreate(self):
+        # Nowa pula po dispose() zachowuje liczniki
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.telemetry.timeouts += 1
+            raise
+        finally:
+            self.telemetry.record_wait(time.perf_counter() - started)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.telemetry.connected_at[id(connection_record)] = time.monotonic()
+
+    def _on_close(self, dbapi_connection, connection_record):
+        self.telemetry.connected_at.pop(id(connection_record), None)
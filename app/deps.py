@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth import decode_access_token
 from app.database import get_db
 from app.services.users import get_user_by_username
+from app.services.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -17,8 +18,14 @@ async def get_current_user(
     if not username:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+    # Najpierw cache w pamięci procesu - bez zapytania do Postgresa przy każdym skanie
+    user = user_cache.get(username)
+    if user:
+        return user
+
     user = await get_user_by_username(db, username)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
+    user_cache.set(username, user)
     return user
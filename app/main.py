@@ -1,11 +1,55 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api.router import api_router
+from app.database import engine
+from app.metrics import MetricsMiddleware, instrument_engine, metrics_app
+from app.query_profiler import QueryProfilerMiddleware, instrument_profiler
+from app.services.ai_engine import ai_engine
+from app.services.audit_snapshots import AI_AUDIT_WORKER, run_audit_worker
+from app.services.events import event_broadcaster
+from app.services.pallet_events import PALLET_EVENTS_WRITER, run_pallet_event_writer, run_partition_maintenance
+from app.services.user_cache import USER_CACHE_INVALIDATION, run_invalidation_listener
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Współdzielony klient HTTP do modelu AI (keep-alive)
+    await ai_engine.startup()
+
+    # Zadania w tle działające przez cały czas życia workera
+    background_tasks = [asyncio.create_task(event_broadcaster.run())]
+    if USER_CACHE_INVALIDATION:
+        background_tasks.append(asyncio.create_task(run_invalidation_listener()))
+    if AI_AUDIT_WORKER:
+        background_tasks.append(asyncio.create_task(run_audit_worker()))
+    if PALLET_EVENTS_WRITER:
+        background_tasks.append(asyncio.create_task(run_pallet_event_writer()))
+        background_tasks.append(asyncio.create_task(run_partition_maintenance()))
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await ai_engine.shutdown()
+
 
 app = FastAPI(
     title="Smart Logistics Platform",
     description="System optymalizacji TSL (WMS/TMS)",
-    version="0.5.0"
+    version="0.5.0",
+    lifespan=lifespan,
 )
 
 # Rejestrujemy wszystkie routery jednym poleceniem
-app.include_router(api_router)
\ No newline at end of file
+app.include_router(api_router)
+
+# Metryki Prometheus: trasy API, zapytania SQL, Redis i modele AI
+instrument_engine(engine)
+app.add_middleware(MetricsMiddleware)
+app.mount("/metrics", metrics_app())
+
+# Profiler zapytań SQL (opt-in: QUERY_PROFILER=1 lub nagłówek X-Query-Profile: 1)
+instrument_profiler(engine)
+app.add_middleware(QueryProfilerMiddleware)
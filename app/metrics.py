@@ -0,0 +1,177 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    make_asgi_app,
+    multiprocess,
+)
+from sqlalchemy import event
+
+# --- API ---
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Czas obsługi żądania HTTP",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Liczba żądań HTTP wg statusu odpowiedzi",
+    ["method", "route", "status"],
+)
+
+# --- Postgres ---
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Czas pojedynczego zapytania SQL",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Liczba zapytań SQL wykonanych przez jedno żądanie",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Łączny czas zapytań SQL w jednym żądaniu",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5),
+)
+
+# --- Redis ---
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Czas komendy Redis (PIPELINE = cały pipeline)",
+    ["command"],
+    buckets=(0.0002, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1, 5),
+)
+
+# --- LLM ---
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "Czas wywołania modelu AI",
+    ["mode", "operation"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokeny zużyte przez model AI",
+    ["mode", "kind"],
+)
+
+
+class RequestDBStats:
+    """Zapytania SQL bieżącego żądania - zbierane przez zdarzenia SQLAlchemy."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+
+
+current_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("current_db_stats", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Podpina liczniki zapytań pod silnik (AsyncEngine -> zdarzenia na sync_engine)."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        # Start na kontekście wykonania, nie na połączeniu: after_cursor_execute nie przychodzi
+        # dla zapytania z błędem, a wpis na połączeniu z puli przesunąłby czasy kolejnych zapytań
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_start", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERY_DURATION.labels(operation=operation).observe(elapsed)
+
+        stats = current_db_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.total_time += elapsed
+
+
+def observe_redis_command(command: str, seconds: float) -> None:
+    REDIS_COMMAND_DURATION.labels(command=command).observe(seconds)
+
+
+def observe_llm_call(mode: str, operation: str, seconds: float) -> None:
+    LLM_REQUEST_DURATION.labels(mode=mode, operation=operation).observe(seconds)
+
+
+def observe_llm_tokens(mode: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    if prompt_tokens:
+        LLM_TOKENS.labels(mode=mode, kind="prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(mode=mode, kind="completion").inc(completion_tokens)
+
+
+def route_label(scope) -> str:
+    # Szablon ścieżki (np. /api/pallets/{barcode}/ai-check), nie surowy URL - ograniczona liczba serii
+    app = scope.get("app")
+    endpoint = scope.get("endpoint")
+    if app is None or endpoint is None:
+        return "unmatched"
+    routes = getattr(app.state, "metrics_route_paths", None)
+    if routes is None:
+        routes = {route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")}
+        app.state.metrics_route_paths = routes
+    return routes.get(endpoint, "unmatched")
+
+
+class MetricsMiddleware:
+    """Czysty middleware ASGI: czas żądania, status i zapytania SQL na trasę."""
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.skip_paths):
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDBStats()
+        token = current_db_stats.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = route_label(scope)
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method=method, route=route).observe(elapsed)
+            HTTP_REQUESTS.labels(method=method, route=route, status=str(status_code)).inc()
+            DB_QUERIES_PER_REQUEST.labels(route=route).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(route=route).observe(stats.total_time)
+            current_db_stats.reset(token)
+
+
+def metrics_app():
+    """Aplikacja ASGI pod /metrics; przy wielu workerach (PROMETHEUS_MULTIPROC_DIR) agreguje procesy."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return make_asgi_app(registry=registry)
+    return make_asgi_app()
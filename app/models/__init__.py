@@ -1,6 +1,7 @@
 from .pallet import Pallet
+from .pallet_event import PalletEvent
 from .dock import Dock
 from .shipment import Shipment
 from .user import User
 
-__all__ = ["Pallet", "Dock", "Shipment", "User"]
\ No newline at end of file
+__all__ = ["Pallet", "PalletEvent", "Dock", "Shipment", "User"]
\ No newline at end of file
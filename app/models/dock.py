@@ -1,5 +1,6 @@
 import enum
-from sqlalchemy import Column, String, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, Index, text
+from sqlalchemy.dialects.postgresql import UUID
 from app.database import Base
 import uuid
 
@@ -11,9 +12,13 @@ class DockType(str, enum.Enum):
 
 class Dock(Base):
     __tablename__ = "docks"
+    __table_args__ = (
+        # Rampa po aktywnej trasie (zwolnienie rampy); wolne rampy poza indeksem
+        Index("ix_docks_current_shipment_id", "current_shipment_id", postgresql_where=text("current_shipment_id IS NOT NULL")),
+    )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     number = Column(String, unique=True, index=True, nullable=False) # Np. "R-01"
     dock_type = Column(SQLEnum(DockType), default=DockType.STANDARD, nullable=False)
     is_occupied = Column(Boolean, default=False)
-    current_shipment_id = Column(String, nullable=True)
\ No newline at end of file
+    current_shipment_id = Column(UUID(as_uuid=True), nullable=True)
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -6,13 +7,20 @@ import uuid
 
 class Pallet(Base):
     __tablename__ = "pallets"
+    __table_args__ = (
+        # Klucz stronicowania keyset (created_at, id)
+        Index("ix_pallets_created_at_id", "created_at", "id"),
+        # SUM(weight) po trasie jako Index Only Scan
+        Index("ix_pallets_shipment_id_weight", "shipment_id", postgresql_include=["weight"]),
+        Index("ix_pallets_current_dock_id", "current_dock_id", postgresql_where=text("current_dock_id IS NOT NULL")),
+    )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     barcode = Column(String, unique=True, index=True, nullable=False)
     status = Column(String, default="STAGED")
     weight = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    current_dock_id = Column(String, ForeignKey("docks.id"), nullable=True)
+    current_dock_id = Column(UUID(as_uuid=True), ForeignKey("docks.id"), nullable=True)
     dock = relationship("Dock")
-    shipment_id = Column(String, ForeignKey("shipments.id"), nullable=True)
+    shipment_id = Column(UUID(as_uuid=True), ForeignKey("shipments.id"), nullable=True)
 
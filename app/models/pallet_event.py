@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, Integer, Index, PrimaryKeyConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+class PalletEvent(Base):
+    """Historia skanów i zmian stanu palet (tylko dopisywanie), partycjonowana dziennie po occurred_at."""
+    __tablename__ = "pallet_events"
+    __table_args__ = (
+        # Klucz partycjonowania musi wchodzić do PK; event_id = ID wpisu w strumieniu Redis (ponowny zapis = no-op)
+        PrimaryKeyConstraint("event_id", "occurred_at"),
+        Index("ix_pallet_events_barcode_occurred_at", "barcode", "occurred_at"),
+        Index("ix_pallet_events_dock_number_occurred_at", "dock_number", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+    event_id = Column(String, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    event_type = Column(String, nullable=False)  # np. pallet.created, pallet.loaded
+    pallet_id = Column(UUID(as_uuid=True), nullable=True)
+    barcode = Column(String, nullable=False)
+    status = Column(String, nullable=True)
+    weight = Column(Integer, nullable=True)
+    dock_id = Column(UUID(as_uuid=True), nullable=True)
+    dock_number = Column(String, nullable=True)
+    shipment_id = Column(UUID(as_uuid=True), nullable=True)
@@ -1,7 +1,9 @@
 import enum
-from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, Integer
+from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.dock import DockType
 import uuid
 
 class ShipmentStatus(str, enum.Enum):
@@ -13,11 +15,26 @@ class ShipmentStatus(str, enum.Enum):
 
 class Shipment(Base):
     __tablename__ = "shipments"
+    __table_args__ = (
+        # Klucz stronicowania keyset (created_at, id)
+        Index("ix_shipments_created_at_id", "created_at", "id"),
+        # load-summary?status=... - trasy w danym statusie w kolejności (created_at, id), bez przeglądania archiwum
+        Index("ix_shipments_status_created_at_id", "status", "created_at", "id"),
+    )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     reference_number = Column(String, unique=True, index=True, nullable=False) # Numer zlecenia
     origin = Column(String, nullable=False)      # Punkt A
     destination = Column(String, nullable=False) # Punkt B
     status = Column(SQLEnum(ShipmentStatus), default=ShipmentStatus.PENDING)
     max_weight_capacity = Column(Integer, default=12000, nullable=False)
+    # Wymagany typ rampy (chłodnia, bus) i priorytet - dla automatycznego przydziału ramp
+    required_dock_type = Column(
+        SQLEnum(DockType, name="docktype", create_type=False),
+        default=DockType.STANDARD, server_default=DockType.STANDARD.value, nullable=False,
+    )
+    priority = Column(Integer, default=0, server_default="0", nullable=False)
+    # Liczniki załadunku utrzymywane przy skanie (zamiast SUM po paletach)
+    loaded_weight = Column(Integer, default=0, server_default="0", nullable=False)
+    pallet_count = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+from app.metrics import route_label
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Profiler jest opt-in: QUERY_PROFILER=1 włącza go dla każdego żądania,
+# w przeciwnym razie tylko dla żądań z nagłówkiem X-Query-Profile: 1
+QUERY_PROFILER = os.getenv("QUERY_PROFILER", "0") == "1"
+QUERY_PROFILER_HEADER = b"x-query-profile"
+# Powyżej tylu zapytań na żądanie logujemy ostrzeżenie
+QUERY_PROFILER_THRESHOLD = int(os.getenv("QUERY_PROFILER_THRESHOLD", "10"))
+# Ten sam SQL wykonany tyle razy w jednym żądaniu traktujemy jako podejrzenie N+1
+QUERY_PROFILER_DUPLICATES = int(os.getenv("QUERY_PROFILER_DUPLICATES", "3"))
+
+
+class RequestProfile:
+    """Wszystkie zapytania SQL jednego żądania, pogrupowane po treści statementu."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        # statement -> [liczba wykonań, łączny czas]
+        self.statements: dict[str, list] = defaultdict(lambda: [0, 0.0])
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        entry = self.statements[statement]
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def duplicates(self) -> list[dict]:
+        """Statementy powtórzone w obrębie żądania - od najczęstszych."""
+        repeated = [
+            {"statement": statement, "count": count, "total_ms": round(total * 1000, 2)}
+            for statement, (count, total) in self.statements.items()
+            if count > 1
+        ]
+        return sorted(repeated, key=lambda item: item["count"], reverse=True)
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+class RouteProfileStore:
+    """Zbiorcze statystyki profilera per trasa (w pamięci workera) - do endpointu diagnostycznego."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = {}
+
+    def add(self, route: str, method: str, profile: RequestProfile) -> None:
+        key = f"{method} {route}"
+        duplicates = profile.duplicates()
+        with self._lock:
+            stats = self._routes.setdefault(key, {
+                "route": route,
+                "method": method,
+                "requests": 0,
+                "total_queries": 0,
+                "max_queries": 0,
+                "total_db_ms": 0.0,
+                "worst_duplicates": [],
+            })
+            stats["requests"] += 1
+            stats["total_queries"] += profile.count
+            stats["total_db_ms"] += profile.total_time * 1000
+            if profile.count >= stats["max_queries"]:
+                stats["max_queries"] = profile.count
+                stats["worst_duplicates"] = duplicates[:5]
+
+    def worst(self, limit: int = 20) -> list[dict]:
+        with self._lock:
+            routes = [dict(stats) for stats in self._routes.values()]
+        for stats in routes:
+            stats["avg_queries"] = round(stats["total_queries"] / stats["requests"], 2)
+            stats["avg_db_ms"] = round(stats["total_db_ms"] / stats["requests"], 2)
+            stats["total_db_ms"] = round(stats["total_db_ms"], 2)
+        routes.sort(key=lambda stats: (stats["max_queries"], stats["avg_queries"]), reverse=True)
+        return routes[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_profiles = RouteProfileStore()
+
+
+def instrument_profiler(engine) -> None:
+    """Podpina profiler pod silnik (AsyncEngine -> zdarzenia na sync_engine). Bez aktywnego profilu nic nie robi."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        # Jak w app.metrics: start na kontekście wykonania (zapytanie z błędem nie zostawia śladu na połączeniu)
+        if current_profile.get() is not None and context is not None:
+            context._profiler_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+        started = getattr(context, "_profiler_start", None)
+        if profile is None or started is None:
+            return
+        profile.record(statement, time.perf_counter() - started)
+
+
+class QueryProfilerMiddleware:
+    """Czysty middleware ASGI: zbiera zapytania SQL żądania, ostrzega o N+1 i zbyt wielu zapytaniach."""
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.skip_paths):
+            await self.app(scope, receive, send)
+            return
+
+        requested = dict(scope["headers"]).get(QUERY_PROFILER_HEADER) == b"1"
+        if not (QUERY_PROFILER or requested):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+
+        async def send_with_profile(message):
+            # Przy jawnym żądaniu profilu zwracamy podsumowanie w nagłówkach odpowiedzi
+            if requested and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(profile.count).encode()))
+                headers.append((b"x-query-time-ms", f"{profile.total_time * 1000:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            current_profile.reset(token)
+            route = route_label(scope)
+            method = scope["method"]
+            route_profiles.add(route, method, profile)
+            self._warn(method, route, profile)
+
+    @staticmethod
+    def _warn(method: str, route: str, profile: RequestProfile) -> None:
+        if profile.count > QUERY_PROFILER_THRESHOLD:
+            logger.warning(
+                "%s %s wykonał %d zapytań SQL (%.1f ms, próg %d)",
+                method, route, profile.count, profile.total_time * 1000, QUERY_PROFILER_THRESHOLD,
+            )
+        for duplicate in profile.duplicates():
+            if duplicate["count"] < QUERY_PROFILER_DUPLICATES:
+                break
+            logger.warning(
+                "Możliwe N+1 w %s %s: ten sam SQL wykonany %d razy: %s",
+                method, route, duplicate["count"], " ".join(duplicate["statement"].split())[:300],
+            )
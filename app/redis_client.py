@@ -1,10 +1,56 @@
+import os
+import time
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from dotenv import load_dotenv
+from app.metrics import observe_redis_command
+
+load_dotenv()
+
+# Adres z Twojego Docker Compose (REDIS_URL pozwala wskazać inną instancję, np. do benchmarków)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            observe_redis_command("PIPELINE", time.perf_counter() - started)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Klient Redis mierzący czas każdej komendy (metryka redis_command_duration_seconds)."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            observe_redis_command(str(args[0]).upper(), time.perf_counter() - started)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
 
-# Adres z Twojego Docker Compose
-REDIS_URL = "redis://localhost:6379"
 
 # Tworzymy asynchronicznego klienta Redisa
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+redis_client = InstrumentedRedis.from_url(REDIS_URL, decode_responses=True)
+
+# Zwolnienie blokady (SET NX EX z tokenem) tylko przez właściciela - po wygaśnięciu TTL
+# blokadę może trzymać już inny worker
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+async def release_lock(key: str, token: str) -> bool:
+    return bool(await redis_client.eval(RELEASE_LOCK_SCRIPT, 1, key, token))
 
 async def get_redis():
     return redis_client
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from uuid import UUID
 from app.models.dock import DockType
 
 class DockCreate(BaseModel):
@@ -7,11 +8,11 @@ class DockCreate(BaseModel):
     dock_type: DockType = DockType.STANDARD
 
 class DockResponse(BaseModel):
-    id: str
+    id: UUID
     number: str
     dock_type: DockType
     is_occupied: bool
-    current_shipment_id: Optional[str] = None
+    current_shipment_id: Optional[UUID] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -1,10 +1,17 @@
-from pydantic import BaseModel
+import enum
+from pydantic import BaseModel, Field
 from typing import Optional
+from uuid import UUID
 from datetime import datetime
 
 class PalletScanToDock(BaseModel):
     barcode: str
     dock_number: str
+
+# Cały rząd palet skanowany na jedną rampę
+class PalletBatchScanToDock(BaseModel):
+    dock_number: str
+    barcodes: list[str] = Field(..., min_length=1, max_length=1000)
     
 # To, co skaner wysyła do nas
 class PalletCreate(BaseModel):
@@ -13,13 +20,45 @@ class PalletCreate(BaseModel):
 
 # To, co API wysyła z powrotem do skanera (z ID i datą)
 class PalletResponse(BaseModel):
-    id: str
+    id: UUID
     barcode: str
     status: str
     weight: Optional[int] = None
-    current_dock_id: Optional[str] = None
-    shipment_id: Optional[str] = None 
+    current_dock_id: Optional[UUID] = None
+    shipment_id: Optional[UUID] = None 
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+# Paczka skanów wysyłana hurtowo przez gateway
+class PalletBulkCreate(BaseModel):
+    pallets: list[PalletCreate] = Field(..., min_length=1, max_length=1000)
+
+class BulkItemStatus(str, enum.Enum):
+    CREATED = "CREATED"
+    DUPLICATE_SCAN = "DUPLICATE_SCAN"   # Ten sam skan w toku (klucz idempotencji) / duplikat w paczce
+    ALREADY_EXISTS = "ALREADY_EXISTS"   # Kod kreskowy jest już w bazie
+
+# Wynik dla pojedynczej pozycji z paczki (kolejność jak w żądaniu)
+class PalletBulkItemResult(BaseModel):
+    barcode: str
+    status: BulkItemStatus
+    detail: Optional[str] = None
+    pallet: Optional[PalletResponse] = None
+
+# Wpis historii palety (pallet_events)
+class PalletEventResponse(BaseModel):
+    event_id: str
+    occurred_at: datetime
+    event_type: str
+    pallet_id: Optional[UUID] = None
+    barcode: str
+    status: Optional[str] = None
+    weight: Optional[int] = None
+    dock_id: Optional[UUID] = None
+    dock_number: Optional[str] = None
+    shipment_id: Optional[UUID] = None
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
+from uuid import UUID
+from app.models.dock import DockType
 from app.models.shipment import ShipmentStatus
 
 class ShipmentCreate(BaseModel):
@@ -8,15 +10,72 @@ class ShipmentCreate(BaseModel):
     origin: str
     destination: str
     status: Optional[ShipmentStatus] = ShipmentStatus.PENDING
+    required_dock_type: DockType = DockType.STANDARD
+    priority: int = 0
 
 class ShipmentResponse(BaseModel):
-    id: str
+    id: UUID
     reference_number: str
     origin: str
     destination: str
     status: ShipmentStatus
     max_weight_capacity: int
+    required_dock_type: DockType = DockType.STANDARD
+    priority: int = 0
+    loaded_weight: int = 0
+    pallet_count: int = 0
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+# Stan załadunku trasy (Weight Guard) liczony po stronie serwera
+class ShipmentLoadSummary(BaseModel):
+    id: UUID
+    reference_number: str
+    origin: str
+    destination: str
+    status: ShipmentStatus
+    pallet_count: int
+    loaded_weight: int
+    max_weight_capacity: int
+    fill_percent: float
+
+# Pojedyncze przypisanie trasy do rampy w planie automatycznego przydziału
+class DockAssignmentItem(BaseModel):
+    dock_number: str
+    dock_type: DockType
+    shipment_id: UUID
+    reference_number: str
+    required_dock_type: DockType
+    priority: int
+
+class DockAssignmentPlan(BaseModel):
+    applied: bool
+    assignments: list[DockAssignmentItem]
+    unassigned_shipments: list[str]
+    free_docks_left: list[str]
+    compute_ms: float
+
+# Planowane wypełnienie trasy paletami STAGED (plan załadunku)
+class LoadPlanShipment(BaseModel):
+    shipment_id: UUID
+    reference_number: str
+    max_weight_capacity: int
+    loaded_weight: int
+    planned_weight: int
+    planned_pallets: int
+    fill_percent: float
+
+class LoadPlanItem(BaseModel):
+    barcode: str
+    reference_number: str
+
+class LoadPlanResponse(BaseModel):
+    pallets_planned: int
+    pallets_unplaced: int
+    shipments: list[LoadPlanShipment]
+    assignments: list[LoadPlanItem]
+    unplaced_pallets: list[str]
+    unweighed_pallets: list[str]
+    compute_ms: float
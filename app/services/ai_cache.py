@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+import logging
+import os
+
+from dotenv import load_dotenv
+from redis.exceptions import RedisError
+
+from app.redis_client import redis_client
+from app.services.ai_engine import ai_engine, PALLET_PROMPT_VERSION
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+AI_CHECK_CACHE_TTL = int(os.getenv("AI_CHECK_CACHE_TTL", "3600"))
+
+# Odpowiedzi silnika, które są komunikatem o błędzie - tych nie cache'ujemy
+_ERROR_PREFIXES = ("Błąd", "Nieznany tryb")
+
+# Trwające generacje w tym procesie: klucz cache -> zadanie (request coalescing)
+_in_flight: dict[str, asyncio.Task] = {}
+
+
+def pallet_check_key(barcode: str, weight: int, status: str) -> str:
+    raw = f"{barcode}|{weight}|{status}|{ai_engine.model_id()}|{PALLET_PROMPT_VERSION}"
+    return f"ai_check:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+async def _generate_and_store(key: str, barcode: str, weight: int, status: str) -> str:
+    analysis = await ai_engine.analyze_pallet_safety(barcode=barcode, weight=weight, status=status)
+    if analysis and not analysis.startswith(_ERROR_PREFIXES):
+        try:
+            await redis_client.set(key, analysis, ex=AI_CHECK_CACHE_TTL)
+        except RedisError as e:
+            logger.warning("Nie udało się zapisać wyniku AI w cache: %s", e)
+    return analysis
+
+
+async def get_pallet_check(barcode: str, weight: int, status: str) -> tuple[str, bool]:
+    """
+    Analiza AI palety z cache Redis. Zwraca (analiza, czy_z_cache).
+    Równoległe identyczne żądania czekają na jedno wspólne wywołanie modelu.
+    """
+    key = pallet_check_key(barcode, weight, status)
+    try:
+        cached = await redis_client.get(key)
+    except RedisError as e:
+        logger.warning("Cache AI niedostępny: %s", e)
+        cached = None
+    if cached is not None:
+        return cached, True
+
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(_generate_and_store(key, barcode, weight, status))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+
+    # shield: rozłączenie jednego klienta nie anuluje generacji, na którą czekają inni
+    return await asyncio.shield(task), False
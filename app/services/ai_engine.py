@@ -1,12 +1,37 @@
+import asyncio
+import json
 import os
+import time
+from contextlib import asynccontextmanager
 import httpx
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from app.metrics import observe_llm_call, observe_llm_tokens
 
 load_dotenv()
 
+# Ile generacji LLM może trwać jednocześnie (reszta czeka w kolejce)
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "2"))
+# Ile żądań może czekać w kolejce, zanim zaczniemy odrzucać (503)
+AI_MAX_QUEUE = int(os.getenv("AI_MAX_QUEUE", "20"))
+AI_HTTP_TIMEOUT = float(os.getenv("AI_HTTP_TIMEOUT", "60"))
+
+OLLAMA_MODEL = "llama3"
+OPENAI_MODEL = "gpt-4o-mini"
+# Podbij przy każdej zmianie promptu analizy palety - unieważnia cache wyników
+PALLET_PROMPT_VERSION = "1"
+
+
+class AIOverloadedError(Exception):
+    """Kolejka żądań do modelu jest pełna."""
+
+
+class AIResponseError(Exception):
+    """Model nie zwrócił odpowiedzi (błąd HTTP lub pusty wynik)."""
+
+
 class LogisticsAI:
-    def __init__(self, mode="mock"):
+    def __init__(self, mode="mock", max_concurrency=AI_MAX_CONCURRENCY, max_queue=AI_MAX_QUEUE):
         """
         mode: 'mock' (testy), 'openai' (chmura), 'ollama' (lokalnie na M1)
         """
@@ -18,6 +43,86 @@ class LogisticsAI:
         # Adres lokalnej Ollamy na Twoim Macu
         self.ollama_url = "http://127.0.0.1:11434/api/generate"
 
+        # Jeden klient HTTP z keep-alive na cały proces (otwierany w lifespan aplikacji)
+        self.http_client = None
+
+        # Limit równoległych generacji + metryki kolejki
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def startup(self):
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                timeout=AI_HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+
+    async def shutdown(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    async def _client(self) -> httpx.AsyncClient:
+        # Poza aplikacją (skrypty, benchmarki) klient powstaje przy pierwszym użyciu
+        if self.http_client is None:
+            await self.startup()
+        return self.http_client
+
+    @asynccontextmanager
+    async def _llm_slot(self, operation: str):
+        """Miejsce w limicie równoległych wywołań modelu; mierzy czas oczekiwania i wywołania."""
+        if self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise AIOverloadedError("Kolejka AI jest pełna, spróbuj ponownie za chwilę")
+
+        self.queue_depth += 1
+        started = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.perf_counter() - started
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.in_flight += 1
+        call_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            observe_llm_call(self.mode, operation, time.perf_counter() - call_started)
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def model_id(self) -> str:
+        models = {"ollama": OLLAMA_MODEL, "openai": OPENAI_MODEL}
+        return f"{self.mode}:{models.get(self.mode, self.mode)}"
+
+    def stats(self) -> dict:
+        started = self.completed + self.in_flight
+        return {
+            "mode": self.mode,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / started * 1000, 2) if started else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
     async def analyze_pallet_safety(self, barcode: str, weight: int, status: str):
         # 1. TRYB MOCK (Na wyjazd - zero transferu, zero kosztów)
         if self.mode == "mock":
@@ -26,23 +131,29 @@ class LogisticsAI:
         # 2. TRYB OPENAI (Chmura - wymaga klucza API w .env)
         if self.mode == "openai":
             try:
-                response = await self.openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": "Jesteś ekspertem logistyki WMS."},
-                        {"role": "user", "content": f"Oceń bezpieczeństwo palety {barcode}, waga {weight}kg, status {status}."}
-                    ],
-                    max_tokens=100
-                )
+                async with self._llm_slot("pallet_safety"):
+                    response = await self.openai_client.chat.completions.create(
+                        model=OPENAI_MODEL,
+                        messages=[
+                            {"role": "system", "content": "Jesteś ekspertem logistyki WMS."},
+                            {"role": "user", "content": f"Oceń bezpieczeństwo palety {barcode}, waga {weight}kg, status {status}."}
+                        ],
+                        max_tokens=100
+                    )
+                if response.usage:
+                    observe_llm_tokens(self.mode, response.usage.prompt_tokens, response.usage.completion_tokens)
                 return response.choices[0].message.content
+            except AIOverloadedError:
+                raise
             except Exception as e:
                 return f"Błąd OpenAI: {str(e)}"
 
         if self.mode == "ollama":
             try:
-                async with httpx.AsyncClient() as client:
+                client = await self._client()
+                async with self._llm_slot("pallet_safety"):
                     payload = {
-                        "model": "llama3",
+                        "model": OLLAMA_MODEL,
                         "prompt": f"Jesteś szybkim asystentem WMS. Paleta {barcode}, waga {weight}kg, status {status}. Czy jest OK? Odpowiedz w 5 słowach.",
                         "stream": False,
                         "options": {
@@ -51,20 +162,24 @@ class LogisticsAI:
                             "top_k": 10            # Ogranicza wybór słów
                         }
                     }
-                    response = await client.post(self.ollama_url, json=payload, timeout=60.0)
+                    response = await client.post(self.ollama_url, json=payload)
                     if response.status_code == 200:
-                        return response.json().get("response")
+                        result = response.json()
+                        observe_llm_tokens(self.mode, result.get("prompt_eval_count"), result.get("eval_count"))
+                        return result.get("response")
                     return "Błąd Ollama"
+            except AIOverloadedError:
+                raise
             except Exception as e:
                 return f"Błąd połączenia: {str(e)}"
             
         return "Nieznany tryb pracy AI."
 
-    async def analyze_warehouse_state(self, docks_data: list, shipments_data: list):
+    def _warehouse_prompt(self, docks_data: list, shipments_data: list) -> str:
         docks_info = "\n".join([f"- Rampa {d.number}: {'ZAJĘTA' if d.is_occupied else 'WOLNA'}" for d in docks_data])
         ship_info = "\n".join([f"- Trasa {s.reference_number} do {s.destination}: {s.status}" for s in shipments_data])
 
-        prompt = f"""
+        return f"""
         [INST] Jesteś ekspertem logistyki i kierownikiem polskiego magazynu. 
         Przeanalizuj poniższy stan obiektu i odpowiedz WYŁĄCZNIE W JĘZYKU POLSKIM.
         
@@ -80,9 +195,31 @@ class LogisticsAI:
         3. Jaki jest najważniejszy krok na teraz? [/INST]
         """
 
-        async with httpx.AsyncClient() as client:
+    async def analyze_warehouse_state(self, docks_data: list, shipments_data: list):
+        prompt = self._warehouse_prompt(docks_data, shipments_data)
+
+        if self.mode == "mock":
+            return "[MOCK AI] Audyt: rampy i trasy w normie, brak wąskich gardeł."
+
+        if self.mode == "openai":
+            async with self._llm_slot("warehouse_audit"):
+                response = await self.openai_client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=200,
+                    temperature=0.2,
+                )
+            if response.usage:
+                observe_llm_tokens(self.mode, response.usage.prompt_tokens, response.usage.completion_tokens)
+            content = response.choices[0].message.content if response.choices else None
+            if not content:
+                raise AIResponseError("AI zwróciło pustą odpowiedź")
+            return content
+
+        client = await self._client()
+        async with self._llm_slot("warehouse_audit"):
             payload = {
-                "model": "llama3",
+                "model": OLLAMA_MODEL,
                 "prompt": prompt,
                 "stream": False,
                 "options": {
@@ -90,8 +227,69 @@ class LogisticsAI:
                     "temperature": 0.2
                 }
             }
-            response = await client.post(self.ollama_url, json=payload, timeout=60.0)
-            return response.json().get("response") if response.status_code == 200 else "Błąd: AI nie odpowiedziało."
+            response = await client.post(self.ollama_url, json=payload)
+            if response.status_code != 200:
+                # Wyjątek zamiast tekstu błędu - audyt nie może zapisać go jako wyniku
+                raise AIResponseError(f"AI nie odpowiedziało (HTTP {response.status_code})")
+            result = response.json()
+            observe_llm_tokens(self.mode, result.get("prompt_eval_count"), result.get("eval_count"))
+            if not result.get("response"):
+                raise AIResponseError("AI zwróciło pustą odpowiedź")
+            return result.get("response")
+
+    async def stream_warehouse_state(self, docks_data: list, shipments_data: list):
+        """
+        Strumieniowa wersja audytu - zwraca kolejne fragmenty tekstu, gdy tylko model je wygeneruje.
+        Anulowanie generatora (rozłączenie klienta) zamyka połączenie z modelem i przerywa generację.
+        """
+        prompt = self._warehouse_prompt(docks_data, shipments_data)
+
+        if self.mode == "mock":
+            for word in "[MOCK AI] Audyt: rampy i trasy w normie, brak wąskich gardeł.".split(" "):
+                yield word + " "
+            return
+
+        async with self._llm_slot("warehouse_audit_stream"):
+            if self.mode == "openai":
+                stream = await self.openai_client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=200,
+                    temperature=0.2,
+                    stream=True,
+                )
+                try:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                finally:
+                    await stream.response.aclose()
+                return
+
+            client = await self._client()
+            payload = {
+                "model": OLLAMA_MODEL,
+                "prompt": prompt,
+                "stream": True,
+                "options": {
+                    "num_predict": 200, 
+                    "temperature": 0.2
+                }
+            }
+            async with client.stream("POST", self.ollama_url, json=payload) as response:
+                if response.status_code != 200:
+                    yield "Błąd: AI nie odpowiedziało."
+                    return
+                # Ollama wysyła po jednym obiekcie JSON na linię
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        observe_llm_tokens(self.mode, chunk.get("prompt_eval_count"), chunk.get("eval_count"))
+                        return
 
 # Inicjalizacja silnika - na wyjeździe zostaw "mock"
 ai_engine = LogisticsAI(mode="ollama")
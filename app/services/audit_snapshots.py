@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.dock import Dock
+from app.models.shipment import Shipment
+from app.redis_client import redis_client, release_lock
+from app.services.ai_engine import ai_engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Audyt co AI_AUDIT_INTERVAL sekund, a po zmianie stanu ramp/tras najwcześniej po AI_AUDIT_MIN_INTERVAL
+AI_AUDIT_WORKER = os.getenv("AI_AUDIT_WORKER", "1") == "1"
+AI_AUDIT_INTERVAL = int(os.getenv("AI_AUDIT_INTERVAL", "300"))
+AI_AUDIT_MIN_INTERVAL = int(os.getenv("AI_AUDIT_MIN_INTERVAL", "30"))
+AI_AUDIT_POLL = 5
+
+SNAPSHOT_KEY = "ai_audit:latest"
+STALE_KEY = "ai_audit:stale"
+JOBS_QUEUE_KEY = "ai_audit:jobs"
+LOCK_KEY = "ai_audit:lock"
+# Zlecenie czekające na pierwszy audyt - GET bez snapshotu nie kolejkuje kolejnych
+PENDING_JOB_KEY = "ai_audit:pending_job"
+JOB_TTL = 3600
+LOCK_TTL = 120
+
+
+def _job_key(job_id: str) -> str:
+    return f"ai_audit:job:{job_id}"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def get_latest_snapshot() -> Optional[dict]:
+    raw = await redis_client.get(SNAPSHOT_KEY)
+    return json.loads(raw) if raw else None
+
+
+async def mark_audit_stale() -> None:
+    """Wywoływane przy zmianie ramp/tras - worker odświeży audyt przy najbliższej okazji."""
+    try:
+        await redis_client.set(STALE_KEY, "1")
+    except RedisError as e:
+        logger.warning("Nie udało się oznaczyć audytu jako nieaktualnego: %s", e)
+
+
+async def request_refresh(reuse_pending: bool = False) -> str:
+    """Kolejkuje audyt. reuse_pending=True zwraca trwające zlecenie zamiast dokładać nowe."""
+    job_id = uuid.uuid4().hex
+    # Opis zlecenia przed zgłoszeniem go jako trwającego - równoległy GET od razu widzi status
+    await redis_client.set(_job_key(job_id), json.dumps({"job_id": job_id, "status": "queued", "requested_at": _now()}), ex=JOB_TTL)
+    if reuse_pending and not await redis_client.set(PENDING_JOB_KEY, job_id, ex=JOB_TTL, nx=True):
+        pending_id = await redis_client.get(PENDING_JOB_KEY)
+        job = await get_job(pending_id) if pending_id else None
+        if job and job["status"] in ("queued", "running"):
+            await redis_client.delete(_job_key(job_id))
+            return pending_id
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.rpush(JOBS_QUEUE_KEY, job_id)
+        pipe.set(PENDING_JOB_KEY, job_id, ex=JOB_TTL)
+        await pipe.execute()
+    return job_id
+
+
+async def get_job(job_id: str) -> Optional[dict]:
+    raw = await redis_client.get(_job_key(job_id))
+    return json.loads(raw) if raw else None
+
+
+async def _set_jobs(job_ids: list[str], **fields) -> None:
+    if not job_ids:
+        return
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            pipe.set(_job_key(job_id), json.dumps({"job_id": job_id, **fields}), ex=JOB_TTL)
+        await pipe.execute()
+
+
+async def generate_snapshot(trigger: str) -> dict:
+    async with AsyncSessionLocal() as db:
+        docks = (await db.execute(select(Dock))).scalars().all()
+        shipments = (await db.execute(select(Shipment))).scalars().all()
+
+    started = time.perf_counter()
+    report = await ai_engine.analyze_warehouse_state(docks, shipments)
+    snapshot = {
+        "warehouse_health_check": report,
+        "generated_at": _now(),
+        "generated_ts": time.time(),
+        "generation_seconds": round(time.perf_counter() - started, 2),
+        "trigger": trigger,
+        "model": ai_engine.model_id(),
+    }
+    await redis_client.set(SNAPSHOT_KEY, json.dumps(snapshot, ensure_ascii=False))
+    return snapshot
+
+
+async def _next_trigger() -> tuple[Optional[str], list[str]]:
+    """Czeka na powód do odświeżenia audytu; zwraca (powód, zlecenia użytkowników)."""
+    job_id = await redis_client.blpop(JOBS_QUEUE_KEY, timeout=AI_AUDIT_POLL)
+    if job_id:
+        # Wszystkie zlecenia czekające w kolejce obsłuży jedna generacja
+        job_ids = [job_id[1]] + (await redis_client.lpop(JOBS_QUEUE_KEY, 100) or [])
+        return "manual", job_ids
+
+    # Wiek snapshotu liczymy z Redisa, więc harmonogram jest wspólny dla wszystkich workerów
+    snapshot = await get_latest_snapshot()
+    age = time.time() - snapshot["generated_ts"] if snapshot else float("inf")
+    if age >= AI_AUDIT_INTERVAL:
+        return "schedule", []
+    if age >= AI_AUDIT_MIN_INTERVAL and await redis_client.get(STALE_KEY):
+        return "state_change", []
+    return None, []
+
+
+async def run_audit_worker() -> None:
+    """
+    Zadanie w tle (lifespan): generuje audyt według harmonogramu, po zmianach stanu
+    i na żądanie. Przy wielu workerach API generuje tylko ten, który ma blokadę w Redisie.
+    """
+    while True:
+        job_ids = []
+        try:
+            trigger, job_ids = await _next_trigger()
+            if trigger is None:
+                continue
+
+            lock_token = uuid.uuid4().hex
+            if not await redis_client.set(LOCK_KEY, lock_token, ex=LOCK_TTL, nx=True):
+                # Inny worker właśnie generuje - zlecenia wracają do kolejki
+                if job_ids:
+                    await redis_client.rpush(JOBS_QUEUE_KEY, *job_ids)
+                await asyncio.sleep(AI_AUDIT_POLL)
+                continue
+
+            try:
+                await redis_client.delete(STALE_KEY)
+                await _set_jobs(job_ids, status="running", started_at=_now())
+                snapshot = await generate_snapshot(trigger)
+                await _set_jobs(job_ids, status="done", snapshot=snapshot)
+            finally:
+                await release_lock(LOCK_KEY, lock_token)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Generowanie audytu AI nie powiodło się: %s", e)
+            try:
+                await _set_jobs(job_ids, status="failed", detail=str(e))
+            except RedisError:
+                pass
+            await asyncio.sleep(AI_AUDIT_MIN_INTERVAL)
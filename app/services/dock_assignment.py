@@ -0,0 +1,160 @@
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Sequence
+
+from sqlalchemy import exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dock import Dock, DockType
+from app.models.shipment import Shipment, ShipmentStatus
+from app.services.audit_snapshots import mark_audit_stale
+from app.services.dock_cache import invalidate_docks
+from app.services.events import publish_events
+
+# Typ rampy wymagany przez trasę -> rampy, na których można ją obsłużyć (od najlepiej dopasowanej)
+DOCK_COMPATIBILITY: dict[DockType, tuple[DockType, ...]] = {
+    DockType.COLD_CHAIN: (DockType.COLD_CHAIN,),
+    DockType.VAN_ACCESS: (DockType.VAN_ACCESS, DockType.STANDARD),
+    DockType.STANDARD: (DockType.STANDARD, DockType.COLD_CHAIN),
+}
+
+
+@dataclass
+class AssignmentPlan:
+    pairs: list[tuple[Dock, Shipment]]
+    unassigned: list[Shipment]
+    free_docks: list[Dock]
+
+
+class _TypeFlow:
+    """
+    Przepływ trasa-typ -> rampa-typ. Rampy tego samego typu są wymienne, więc dopasowanie
+    liczymy na poziomie typów (3x3) zamiast tysięcy ramp: ścieżka powiększająca kosztuje O(1)
+    niezależnie od liczby ramp i tras.
+    """
+
+    def __init__(self, capacity: dict[DockType, int]):
+        self.free = dict(capacity)
+        self.flow: dict[tuple[DockType, DockType], int] = defaultdict(int)
+
+    def add(self, required: DockType) -> bool:
+        """Dokłada trasę, jeśli razem z już przyjętymi da się ją obsłużyć (ewentualnie przesuwając inne)."""
+        # BFS po typach ramp: z typu d możemy "wypchnąć" trasę typu s, która pasuje też na inny typ
+        parents: dict[DockType, tuple] = {}
+        queue = deque()
+        for dock_type in DOCK_COMPATIBILITY[required]:
+            if dock_type not in parents:
+                parents[dock_type] = (None, required)
+                queue.append(dock_type)
+
+        while queue:
+            dock_type = queue.popleft()
+            if self.free.get(dock_type, 0) > 0:
+                self._augment(dock_type, parents)
+                return True
+            for (moved, used), count in list(self.flow.items()):
+                if used != dock_type or count == 0:
+                    continue
+                for alternative in DOCK_COMPATIBILITY[moved]:
+                    if alternative not in parents:
+                        parents[alternative] = (dock_type, moved)
+                        queue.append(alternative)
+        return False
+
+    def _augment(self, dock_type: DockType, parents: dict) -> None:
+        self.free[dock_type] -= 1
+        while True:
+            previous, shipment_type = parents[dock_type]
+            self.flow[(shipment_type, dock_type)] += 1
+            if previous is None:
+                return
+            # Trasa typu shipment_type przechodzi z rampy previous na dock_type
+            self.flow[(shipment_type, previous)] -= 1
+            dock_type = previous
+
+
+def shipment_order(shipment: Shipment) -> tuple:
+    # Wyższy priorytet pierwszy, przy równym - kolejność zgłoszenia
+    return (-(shipment.priority or 0), shipment.created_at.timestamp() if shipment.created_at else 0, shipment.reference_number)
+
+
+def plan_assignment(docks: Sequence[Dock], shipments: Sequence[Shipment]) -> AssignmentPlan:
+    """
+    Przydział wolnych ramp oczekującym trasom w jednym przebiegu.
+
+    Zbiory tras możliwych do jednoczesnej obsługi tworzą matroid transwersalny, więc zachłanne
+    przyjmowanie tras od najwyższego priorytetu (jeśli nadal istnieje pełne dopasowanie)
+    daje przydział o maksymalnej sumie priorytetów. Konkretne rampy rozdzielamy na końcu:
+    najpierw najlepiej dopasowany typ, najwyższy priorytet dostaje rampę o najniższym numerze.
+    """
+    docks_by_type: dict[DockType, list[Dock]] = defaultdict(list)
+    for dock in sorted(docks, key=lambda d: d.number):
+        docks_by_type[dock.dock_type].append(dock)
+
+    flow = _TypeFlow({dock_type: len(items) for dock_type, items in docks_by_type.items()})
+    accepted: dict[DockType, list[Shipment]] = defaultdict(list)
+    unassigned = []
+    for shipment in sorted(shipments, key=shipment_order):
+        if flow.add(shipment.required_dock_type):
+            accepted[shipment.required_dock_type].append(shipment)
+        else:
+            unassigned.append(shipment)
+
+    pairs = []
+    for required, queue in accepted.items():
+        for dock_type in DOCK_COMPATIBILITY[required]:
+            for _ in range(flow.flow[(required, dock_type)]):
+                pairs.append((docks_by_type[dock_type].pop(0), queue.pop(0)))
+
+    free_docks = [dock for items in docks_by_type.values() for dock in items]
+    return AssignmentPlan(pairs=pairs, unassigned=unassigned, free_docks=free_docks)
+
+
+async def assign_pending_shipments(db: AsyncSession, dry_run: bool = False) -> tuple[AssignmentPlan, float]:
+    """Wolne rampy + trasy PENDING bez rampy -> plan; bez dry_run zapis jedną transakcją. Zwraca (plan, ms obliczeń)."""
+    on_dock = exists().where(Dock.current_shipment_id == Shipment.id)
+    # FOR UPDATE SKIP LOCKED na rampach i trasach: wiersze zablokowane przez trwające ręczne
+    # przypisanie (rampa + trasa FOR UPDATE) pomijamy, a ręczne przypisanie czeka na nasz commit
+    # i widzi rampę zajętą / trasę już na rampie
+    docks = (await db.execute(
+        select(Dock)
+        .where(Dock.is_occupied.is_(False), Dock.current_shipment_id.is_(None))
+        .with_for_update(skip_locked=True)
+    )).scalars().all()
+    shipments = (await db.execute(
+        select(Shipment)
+        .where(Shipment.status == ShipmentStatus.PENDING, ~on_dock)
+        .with_for_update(skip_locked=True)
+    )).scalars().all()
+
+    # NOT EXISTS liczony był na snapshocie sprzed blokad - ręczne przypisanie zatwierdzone w międzyczasie
+    # zmienia tylko rampę, więc po zablokowaniu tras sprawdzamy je ponownie świeżym zapytaniem
+    if shipments:
+        docked = set((await db.execute(
+            select(Dock.current_shipment_id).where(Dock.current_shipment_id.in_([s.id for s in shipments]))
+        )).scalars().all())
+        shipments = [shipment for shipment in shipments if shipment.id not in docked]
+
+    started = time.perf_counter()
+    plan = plan_assignment(docks, shipments)
+    compute_ms = (time.perf_counter() - started) * 1000
+
+    if dry_run or not plan.pairs:
+        await db.rollback()
+        return plan, compute_ms
+
+    # Jeden UPDATE wykonywany paczką (executemany) po kluczu głównym
+    await db.execute(
+        update(Dock).execution_options(synchronize_session=False),
+        [{"id": dock.id, "current_shipment_id": shipment.id, "is_occupied": True} for dock, shipment in plan.pairs],
+    )
+    await db.commit()
+
+    await invalidate_docks(*(dock for dock, _ in plan.pairs))
+    await mark_audit_stale()
+    await publish_events("dock.assigned", [
+        {"dock_number": dock.number, "shipment_id": shipment.id, "reference_number": shipment.reference_number}
+        for dock, shipment in plan.pairs
+    ])
+    return plan, compute_ms
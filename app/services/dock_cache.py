@@ -0,0 +1,77 @@
+import json
+import logging
+
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dock import Dock
+from app.redis_client import redis_client
+from app.schemas.dock import DockResponse
+
+logger = logging.getLogger(__name__)
+
+# Hash: numer rampy -> JSON stanu rampy (typ, zajętość, aktualna trasa)
+DOCKS_HASH_KEY = "docks:state"
+# Obecny tylko, gdy hash zawiera komplet ramp (pusty hash != brak cache)
+DOCKS_LOADED_KEY = "docks:state:loaded"
+# Podbijany przy każdej zmianie - wczytanie z Postgresa nie nadpisze nowszego stanu
+DOCKS_VERSION_KEY = "docks:state:version"
+# Zabezpieczenie: nawet przy zgubionej aktualizacji cache odświeży się najpóźniej po tym czasie
+DOCKS_CACHE_TTL = 300
+
+
+def _serialize(dock: Dock) -> str:
+    return DockResponse.model_validate(dock).model_dump_json()
+
+
+async def _load_from_db(db: AsyncSession) -> list[Dock]:
+    return (await db.execute(select(Dock).order_by(Dock.number))).scalars().all()
+
+
+async def get_cached_docks(db: AsyncSession) -> list[dict]:
+    """Stan ramp z Redisa; przy braku cache czyta Postgresa i wypełnia hash."""
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.exists(DOCKS_LOADED_KEY)
+            pipe.hgetall(DOCKS_HASH_KEY)
+            is_loaded, cached = await pipe.execute()
+        if is_loaded:
+            return [json.loads(cached[number]) for number in sorted(cached)]
+
+        async with redis_client.pipeline(transaction=True) as pipe:
+            # WATCH przed odczytem z bazy: jeśli w międzyczasie ktoś zmieni rampę, nie zapisujemy starego stanu
+            await pipe.watch(DOCKS_VERSION_KEY)
+            docks = await _load_from_db(db)
+            pipe.multi()
+            pipe.delete(DOCKS_HASH_KEY)
+            if docks:
+                pipe.hset(DOCKS_HASH_KEY, mapping={dock.number: _serialize(dock) for dock in docks})
+            pipe.set(DOCKS_LOADED_KEY, "1", ex=DOCKS_CACHE_TTL)
+            try:
+                await pipe.execute()
+            except WatchError:
+                pass
+        return [DockResponse.model_validate(dock).model_dump(mode="json") for dock in docks]
+    except RedisError as e:
+        logger.warning("Cache ramp niedostępny, czytam z Postgresa: %s", e)
+        docks = await _load_from_db(db)
+        return [DockResponse.model_validate(dock).model_dump(mode="json") for dock in docks]
+
+
+async def invalidate_docks(*docks: Dock) -> None:
+    """
+    Po commicie: unieważnia cache ramp (współdzielony przez wszystkie workery). Nie zapisujemy
+    stanu z ORM - dwa workery mogłyby zapisać go w odwrotnej kolejności niż commity w Postgresie.
+    Kolejny odczyt wczytuje rampy z bazy pod WATCH na wersji, więc wypełnienie sprzed tego
+    unieważnienia (stan sprzed commita) nie przetrwa.
+    """
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.incr(DOCKS_VERSION_KEY)
+            pipe.delete(DOCKS_LOADED_KEY)
+            if docks:
+                pipe.hdel(DOCKS_HASH_KEY, *(dock.number for dock in docks))
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Nie udało się unieważnić cache ramp (odświeży się po %ds): %s", DOCKS_CACHE_TTL, e)
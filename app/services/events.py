@@ -0,0 +1,120 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Strumień Redis ze zmianami stanu ramp, palet i tras (przycinany do ~EVENTS_MAXLEN wpisów)
+EVENTS_STREAM = "warehouse:events"
+EVENTS_MAXLEN = 10000
+# Zdarzenia palet dla trwałej historii (pallet_events) - osobny strumień.
+# Przycina go writer historii, poniżej wpisów już potwierdzonych przez grupę konsumentów;
+# PALLET_HISTORY_MAXLEN to tylko bezpiecznik pamięci Redisa, gdy writer długo nie działa
+PALLET_HISTORY_STREAM = "warehouse:pallet_history"
+PALLET_HISTORY_MAXLEN = int(os.getenv("PALLET_HISTORY_MAXLEN", "2000000"))
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+def _queue_event(pipe, payload: dict) -> None:
+    data = {"data": json.dumps(payload, ensure_ascii=False, default=str)}  # UUID kluczy jako tekst
+    pipe.xadd(EVENTS_STREAM, data, maxlen=EVENTS_MAXLEN, approximate=True)
+    if payload["type"].startswith("pallet."):
+        pipe.xadd(PALLET_HISTORY_STREAM, data, maxlen=PALLET_HISTORY_MAXLEN, approximate=True)
+
+
+async def publish_event(event_type: str, **fields) -> None:
+    """Publikuje zdarzenie po commicie. Błąd Redisa nie może zepsuć operacji magazynowej."""
+    payload = {"type": event_type, "ts": time.time(), **fields}
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            _queue_event(pipe, payload)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Nie udało się opublikować zdarzenia %s: %s", event_type, e)
+
+
+async def publish_events(event_type: str, items: list[dict]) -> None:
+    """Wiele zdarzeń jednego typu jednym pipeline'em (np. paczka skanów z /bulk)."""
+    if not items:
+        return
+    now = time.time()
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for fields in items:
+                _queue_event(pipe, {"type": event_type, "ts": now, **fields})
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Nie udało się opublikować %d zdarzeń %s: %s", len(items), event_type, e)
+
+
+def decode_event(entry_id: str, fields: dict) -> dict:
+    return {"id": entry_id, **json.loads(fields["data"])}
+
+
+def stream_id_after(entry_id: str, other_id: str) -> bool:
+    def key(stream_id: str) -> tuple[int, int]:
+        ms, _, seq = stream_id.partition("-")
+        return int(ms), int(seq or 0)
+    return key(entry_id) > key(other_id)
+
+
+async def read_events_after(last_event_id: str, count: int = 1000) -> list[dict]:
+    """Zdarzenia po podanym ID - do wznowienia strumienia po zerwaniu połączenia (Last-Event-ID)."""
+    entries = await redis_client.xrange(EVENTS_STREAM, min=f"({last_event_id}", count=count)
+    return [decode_event(entry_id, fields) for entry_id, fields in entries]
+
+
+def event_matches(event: dict, dock: Optional[str] = None, shipment: Optional[str] = None) -> bool:
+    if dock and event.get("dock_number") != dock:
+        return False
+    if shipment and shipment not in (event.get("shipment_id"), event.get("reference_number")):
+        return False
+    return True
+
+
+class EventBroadcaster:
+    """
+    Jeden czytelnik strumienia Redis na worker rozsyła zdarzenia do kolejek subskrybentów
+    (zamiast osobnego XREAD dla każdego podłączonego ekranu).
+    """
+
+    def __init__(self):
+        self._subscribers: set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _dispatch(self, event: dict) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                # Wolny klient traci najstarsze zdarzenie, ale nie blokuje pozostałych
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def run(self) -> None:
+        last_id = "$"
+        while True:
+            try:
+                response = await redis_client.xread({EVENTS_STREAM: last_id}, block=5000, count=100)
+                for _stream, entries in response or []:
+                    for entry_id, fields in entries:
+                        last_id = entry_id
+                        self._dispatch(decode_event(entry_id, fields))
+            except RedisError as e:
+                logger.warning("Czytanie strumienia zdarzeń przerwane: %s", e)
+                await asyncio.sleep(1)
+
+
+event_broadcaster = EventBroadcaster()
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from redis.exceptions import RedisError
+
+from app.redis_client import redis_client
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Jak długo pamiętamy wynik skanu z kluczem od klienta (ponowienia przychodzą w ciągu sekund-minut)
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "600"))
+# Klucz wyprowadzony z treści skanu chroni tylko przed dwuklikiem - ponowny skan po poprawie
+# stanu (np. przypisaniu trasy do rampy) musi wykonać się od nowa
+IDEMPOTENCY_DERIVED_TTL = int(os.getenv("IDEMPOTENCY_DERIVED_TTL", "10"))
+# Znacznik "w toku" wygasa sam, gdyby worker padł w trakcie obsługi
+IDEMPOTENCY_LOCK_TTL = int(os.getenv("IDEMPOTENCY_LOCK_TTL", "30"))
+# Ile ponowienie czeka na wynik trwającego żądania, zanim dostanie 409
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "10"))
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+_PENDING = "pending"
+
+
+def idempotency_key(scope: str, client_key: Optional[str], *parts: Any) -> str:
+    """Klucz od klienta (nagłówek Idempotency-Key) albo wyprowadzony z treści skanu."""
+    raw = client_key if client_key else "|".join(str(part) for part in parts)
+    return f"idem:{scope}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def fingerprint(*parts: Any) -> str:
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _replay(stored: dict, request_fingerprint: str) -> JSONResponse:
+    if stored["fingerprint"] != request_fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key użyty już dla innego żądania")
+    return JSONResponse(
+        status_code=stored["status_code"],
+        content=stored["body"],
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+async def _wait_for_result(key: str) -> Optional[dict]:
+    """Czeka, aż trwające żądanie zapisze wynik; None gdy znacznik zniknął (obsługa się nie powiodła)."""
+    delay = 0.025
+    deadline = asyncio.get_running_loop().time() + IDEMPOTENCY_WAIT
+    while asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(delay)
+        value = await redis_client.get(key)
+        if value is None:
+            return None
+        if value != _PENDING:
+            return json.loads(value)
+        delay = min(delay * 2, 0.2)
+    raise HTTPException(
+        status_code=409,
+        detail="Skan jest nadal przetwarzany - ponów za chwilę",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def run_idempotent(
+    key: str,
+    request_fingerprint: str,
+    handler: Callable[[], Awaitable[Any]],
+    explicit_key: bool = False,
+) -> JSONResponse:
+    """
+    Pierwsze wykonanie zapisuje wynik w Redisie; ponowienie dostaje zapisaną odpowiedź
+    bez pracy w bazie, a trwające - czeka na wynik. Odrzucenia 4xx zależą od stanu magazynu,
+    więc utrwalamy je tylko przy kluczu od klienta (explicit_key) - przy kluczu z treści
+    skanu ponowienie po poprawie stanu wykonuje się od nowa.
+    """
+    try:
+        acquired = await redis_client.set(key, _PENDING, ex=IDEMPOTENCY_LOCK_TTL, nx=True)
+        while not acquired:
+            value = await redis_client.get(key)
+            if value == _PENDING:
+                stored = await _wait_for_result(key)
+            elif value is not None:
+                stored = json.loads(value)
+            else:
+                stored = None
+            if stored is not None:
+                return _replay(stored, request_fingerprint)
+            # Poprzednia próba nie zostawiła wyniku (błąd serwera) - przejmujemy obsługę
+            acquired = await redis_client.set(key, _PENDING, ex=IDEMPOTENCY_LOCK_TTL, nx=True)
+    except RedisError as e:
+        logger.warning("Idempotencja niedostępna, obsługuję żądanie bez niej: %s", e)
+        return JSONResponse(content=jsonable_encoder(await handler()))
+
+    try:
+        body = jsonable_encoder(await handler())
+        status_code = 200
+    except HTTPException as e:
+        if e.status_code >= 500 or not explicit_key:
+            await _release(key)
+            raise
+        await _store(key, request_fingerprint, e.status_code, {"detail": e.detail}, IDEMPOTENCY_TTL)
+        raise
+    except BaseException:
+        # Błąd serwera lub anulowanie - nie utrwalamy, ponowienie wykona skan od nowa
+        await _release(key)
+        raise
+
+    ttl = IDEMPOTENCY_TTL if explicit_key else IDEMPOTENCY_DERIVED_TTL
+    await _store(key, request_fingerprint, status_code, body, ttl)
+    return JSONResponse(status_code=status_code, content=body)
+
+
+async def _store(key: str, request_fingerprint: str, status_code: int, body: Any, ttl: int) -> None:
+    stored = {"fingerprint": request_fingerprint, "status_code": status_code, "body": body}
+    try:
+        await redis_client.set(key, json.dumps(stored), ex=ttl)
+    except RedisError as e:
+        logger.warning("Nie udało się zapisać wyniku skanu do powtórzeń: %s", e)
+
+
+async def _release(key: str) -> None:
+    try:
+        await redis_client.delete(key)
+    except RedisError as e:
+        logger.warning("Nie udało się zwolnić klucza idempotencji: %s", e)
+
+
+# --- Wiele kluczy naraz (paczka skanów z /bulk) - te same klucze i zapisy co run_idempotent ---
+
+async def claim_many(keys: list[str]) -> list[bool]:
+    """SET NX znacznika "w toku" dla każdego klucza jednym pipeline; bez Redisa - wszystkie przejęte."""
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, _PENDING, ex=IDEMPOTENCY_LOCK_TTL, nx=True)
+            return [bool(acquired) for acquired in await pipe.execute()]
+    except RedisError as e:
+        logger.warning("Idempotencja niedostępna, obsługuję paczkę bez niej: %s", e)
+        return [True] * len(keys)
+
+
+async def stored_results(keys: list[str]) -> list[Optional[dict]]:
+    """Zapisane wyniki kluczy; None dla kluczy w toku lub bez wyniku."""
+    if not keys:
+        return []
+    try:
+        values = await redis_client.mget(keys)
+    except RedisError as e:
+        logger.warning("Nie udało się odczytać wyników skanów: %s", e)
+        return [None] * len(keys)
+    return [json.loads(value) if value and value != _PENDING else None for value in values]
+
+
+async def store_many(results: list[tuple[str, str, Any]], ttl: int = IDEMPOTENCY_DERIVED_TTL) -> None:
+    """Utrwala sukcesy (klucz, odcisk, treść odpowiedzi) jednym pipeline."""
+    if not results:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key, request_fingerprint, body in results:
+                stored = {"fingerprint": request_fingerprint, "status_code": 200, "body": body}
+                pipe.set(key, json.dumps(stored), ex=ttl)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Nie udało się zapisać wyników skanów do powtórzeń: %s", e)
+
+
+async def release_many(keys: list[str]) -> None:
+    if not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except RedisError as e:
+        logger.warning("Nie udało się zwolnić kluczy idempotencji: %s", e)
@@ -0,0 +1,114 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.pallet import Pallet
+from app.models.shipment import Shipment, ShipmentStatus
+from app.services.dock_assignment import shipment_order
+
+# Trasy, na które można jeszcze planować palety
+OPEN_STATUSES = (ShipmentStatus.PENDING, ShipmentStatus.IN_PROGRESS)
+
+
+@dataclass
+class LoadPlan:
+    pallet_barcodes: list[str]
+    pallet_weights: np.ndarray
+    shipments: list[Shipment]
+    # Indeks trasy dla każdej palety (kolejność jak pallet_barcodes), -1 = nie mieści się nigdzie
+    pallet_shipment: np.ndarray
+    planned_weight: np.ndarray
+    planned_pallets: np.ndarray
+    unweighed: list[str]
+    compute_ms: float
+
+
+def first_fit_decreasing(weights: np.ndarray, capacities: np.ndarray) -> np.ndarray:
+    """
+    First-fit decreasing: palety od najcięższej, każda do pierwszej trasy (w kolejności
+    capacities), w której jeszcze się mieści. Zwraca indeks trasy dla każdej palety albo -1.
+
+    Palety o tej samej wadze trafiają w FFD kolejno do tych samych tras, więc całą grupę
+    rozkładamy jednym krokiem: trasa k przyjmuje remaining[k] // w palet, aż grupa się skończy.
+    Koszt to O(liczba różnych wag x liczba tras) operacji wektorowych zamiast pętli po paletach.
+    """
+    weights = np.asarray(weights, dtype=np.int64)
+    remaining = np.asarray(capacities, dtype=np.int64).copy()
+    result = np.full(weights.shape[0], -1, dtype=np.int64)
+    if weights.size == 0 or remaining.size == 0:
+        return result
+
+    order = np.argsort(-weights, kind="stable")
+    sorted_weights = weights[order]
+    bounds = np.flatnonzero(np.diff(sorted_weights)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [sorted_weights.size]))
+    bin_ids = np.arange(remaining.size)
+
+    for start, end in zip(starts, ends):
+        weight = sorted_weights[start]
+        count = end - start
+        if weight <= 0:
+            # Waga 0 mieści się wszędzie - FFD kładzie ją na pierwszą trasę
+            result[order[start:end]] = 0
+            continue
+        fits = remaining // weight
+        cumulative = np.cumsum(fits)
+        if cumulative[-1] <= count:
+            take = fits
+        else:
+            # Ostatnia trasa grupy bierze tylko tyle, ile zostało palet
+            last = int(np.searchsorted(cumulative, count))
+            take = np.where(bin_ids < last, fits, 0)
+            take[last] = count - (cumulative[last - 1] if last else 0)
+        placed = int(take.sum())
+        result[order[start:start + placed]] = np.repeat(bin_ids, take)
+        remaining -= take * weight
+
+    return result
+
+
+async def plan_staged_pallets(db: AsyncSession) -> LoadPlan:
+    """
+    Plan rozłożenia palet STAGED (bez trasy i rampy) na otwarte trasy według wolnej
+    ładowności (max_weight_capacity - loaded_weight). Trasy wypełniane od najwyższego priorytetu.
+    Tylko odczyt - niczego nie przypisuje.
+    """
+    pallet_rows = (await db.execute(
+        select(Pallet.barcode, Pallet.weight)
+        .where(Pallet.status == "STAGED", Pallet.shipment_id.is_(None), Pallet.current_dock_id.is_(None))
+    )).all()
+    shipments = sorted(
+        (await db.execute(select(Shipment).where(Shipment.status.in_(OPEN_STATUSES)))).scalars().all(),
+        key=shipment_order,
+    )
+
+    # Palety bez wagi nie dają się zaplanować po wadze - zwracamy je osobno
+    unweighed = [row.barcode for row in pallet_rows if row.weight is None]
+    weighed = [row for row in pallet_rows if row.weight is not None]
+
+    started = time.perf_counter()
+    weights = np.fromiter((row.weight for row in weighed), dtype=np.int64, count=len(weighed))
+    capacities = np.fromiter(
+        (max(s.max_weight_capacity - (s.loaded_weight or 0), 0) for s in shipments),
+        dtype=np.int64, count=len(shipments),
+    )
+    pallet_shipment = first_fit_decreasing(weights, capacities)
+    placed = pallet_shipment >= 0
+    planned_weight = np.bincount(pallet_shipment[placed], weights=weights[placed], minlength=len(shipments)).astype(np.int64)
+    planned_pallets = np.bincount(pallet_shipment[placed], minlength=len(shipments))
+    compute_ms = (time.perf_counter() - started) * 1000
+
+    return LoadPlan(
+        pallet_barcodes=[row.barcode for row in weighed],
+        pallet_weights=weights,
+        shipments=shipments,
+        pallet_shipment=pallet_shipment,
+        planned_weight=planned_weight,
+        planned_pallets=planned_pallets,
+        unweighed=unweighed,
+        compute_ms=compute_ms,
+    )
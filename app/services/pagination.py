@@ -0,0 +1,74 @@
+import base64
+import enum
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+
+# Ile wierszy serwerowy kursor pobiera z Postgresa na raz w trybie NDJSON
+STREAM_CHUNK_SIZE = 500
+
+
+class SortOrder(str, enum.Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Niepoprawny kursor stronicowania")
+
+
+def _ordered(query: Select, model, order: SortOrder) -> Select:
+    if order == SortOrder.DESC:
+        return query.order_by(model.created_at.desc(), model.id.desc())
+    return query.order_by(model.created_at, model.id)
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    model,
+    cursor: Optional[str],
+    limit: int,
+    order: SortOrder = SortOrder.ASC,
+) -> tuple[list, Optional[str]]:
+    """Strona wyników po kluczu (created_at, id) + kursor do następnej strony."""
+    if cursor:
+        key = tuple_(model.created_at, model.id)
+        position = tuple_(*decode_cursor(cursor))
+        query = query.where(key < position if order == SortOrder.DESC else key > position)
+
+    # Pobieramy jeden wiersz więcej, żeby wiedzieć czy jest kolejna strona
+    rows = (await db.execute(_ordered(query, model, order).limit(limit + 1))).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+async def stream_ndjson(query: Select, model, schema, order: SortOrder = SortOrder.ASC):
+    """
+    Strumieniuje wiersze jako NDJSON przez serwerowy kursor (stream_scalars).
+    Sesja jest otwierana tutaj, bo zależność get_db zamyka się przed wysłaniem odpowiedzi.
+    """
+    async with AsyncSessionLocal() as session:
+        rows = await session.stream_scalars(
+            _ordered(query, model, order).execution_options(yield_per=STREAM_CHUNK_SIZE)
+        )
+        async for row in rows:
+            yield schema.model_validate(row).model_dump_json() + "\n"
@@ -0,0 +1,413 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal, engine
+from app.models.pallet_event import PalletEvent
+from app.redis_client import redis_client, release_lock
+from app.services.events import PALLET_HISTORY_STREAM, decode_event
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Zapis historii palet ze strumienia zdarzeń - poza ścieżką skanu, paczkami
+PALLET_EVENTS_WRITER = os.getenv("PALLET_EVENTS_WRITER", "1") == "1"
+PALLET_EVENTS_BATCH = int(os.getenv("PALLET_EVENTS_BATCH", "500"))
+PALLET_EVENTS_FLUSH_MS = int(os.getenv("PALLET_EVENTS_FLUSH_MS", "1000"))
+# Partycje dzienne: tyle dni naprzód tworzymy, starsze niż retencja odłączamy
+PALLET_EVENTS_PREMAKE_DAYS = int(os.getenv("PALLET_EVENTS_PREMAKE_DAYS", "3"))
+PALLET_EVENTS_RETENTION_DAYS = int(os.getenv("PALLET_EVENTS_RETENTION_DAYS", "90"))
+# Odłączone partycje zostają jako zwykłe tabele (archiwum), chyba że PALLET_EVENTS_DROP_DETACHED=1
+PALLET_EVENTS_DROP_DETACHED = os.getenv("PALLET_EVENTS_DROP_DETACHED", "0") == "1"
+PALLET_EVENTS_MAINTENANCE_INTERVAL = int(os.getenv("PALLET_EVENTS_MAINTENANCE_INTERVAL", "3600"))
+# Domyślne okno zapytań o historię - ogranicza przeglądane partycje
+PALLET_EVENTS_HISTORY_DAYS = int(os.getenv("PALLET_EVENTS_HISTORY_DAYS", "7"))
+
+CONSUMER_GROUP = "pallet_events"
+# Wpisy innego (martwego) workera przejmujemy po takim czasie bez potwierdzenia
+CLAIM_IDLE_MS = 60_000
+# Wpisy, których nie da się zapisać (poza retencją, błędne dane) - poza ścieżką writera, do ręcznej analizy
+DEAD_LETTER_STREAM = "warehouse:pallet_history:dead"
+DEAD_LETTER_MAXLEN = 10000
+# Po tylu nieudanych próbach zapisu paczki zapisujemy wpisy pojedynczo i odkładamy te, które nie przechodzą
+WRITE_ATTEMPTS_BEFORE_SPLIT = 3
+MAINTENANCE_LOCK_KEY = "pallet_events:maintenance"
+MAINTENANCE_LOCK_TTL = 300
+PARTITION_PREFIX = "pallet_events_"
+
+
+# Dni, dla których partycja na pewno istnieje (w tym procesie) - bez DDL przy każdej paczce
+_known_partitions: set[date] = set()
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+
+
+async def ensure_partitions(today: Optional[date] = None) -> None:
+    """Partycje od wczoraj do today + PALLET_EVENTS_PREMAKE_DAYS (zdarzenia z opóźnieniem też mają gdzie trafić)."""
+    today = today or datetime.now(timezone.utc).date()
+    await ensure_partitions_for(today + timedelta(days=offset) for offset in range(-1, PALLET_EVENTS_PREMAKE_DAYS + 1))
+
+
+async def ensure_partitions_for(days: Iterable[date]) -> None:
+    """Partycje dla podanych dni (np. dni zdarzeń z paczki po dłuższym postoju writera)."""
+    missing = sorted(set(days) - _known_partitions)
+    if not missing:
+        return
+    async with engine.begin() as conn:
+        for day in missing:
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF pallet_events "
+                f"FOR VALUES FROM ('{_day_start(day).isoformat()}') TO ('{_day_start(day + timedelta(days=1)).isoformat()}')"
+            ))
+    _known_partitions.update(missing)
+
+
+async def detach_old_partitions(today: Optional[date] = None) -> list[str]:
+    """Odłącza (CONCURRENTLY - bez blokowania zapisów) partycje starsze niż retencja."""
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = today - timedelta(days=PALLET_EVENTS_RETENTION_DAYS)
+    detached = []
+    # DETACH ... CONCURRENTLY nie może działać w transakcji
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        partitions = (await conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'pallet_events'"
+        ))).scalars().all()
+        for name in sorted(partitions):
+            try:
+                day = datetime.strptime(name.removeprefix(PARTITION_PREFIX), "%Y%m%d").date()
+            except ValueError:
+                continue
+            if day >= cutoff:
+                continue
+            await conn.execute(text(f"ALTER TABLE pallet_events DETACH PARTITION {name} CONCURRENTLY"))
+            _known_partitions.discard(day)
+            if PALLET_EVENTS_DROP_DETACHED:
+                await conn.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+    return detached
+
+
+async def run_partition_maintenance() -> None:
+    """Zadanie w tle (lifespan): partycje naprzód i retencja; przy wielu workerach robi to jeden (blokada w Redisie)."""
+    while True:
+        try:
+            lock_token = uuid.uuid4().hex
+            if await redis_client.set(MAINTENANCE_LOCK_KEY, lock_token, ex=MAINTENANCE_LOCK_TTL, nx=True):
+                try:
+                    await ensure_partitions()
+                    detached = await detach_old_partitions()
+                    if detached:
+                        logger.info("Odłączono partycje historii palet: %s", ", ".join(detached))
+                finally:
+                    await release_lock(MAINTENANCE_LOCK_KEY, lock_token)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Utrzymanie partycji pallet_events nie powiodło się: %s", e)
+        await asyncio.sleep(PALLET_EVENTS_MAINTENANCE_INTERVAL)
+
+
+def _to_row(event: dict) -> Optional[dict]:
+    if not event.get("type", "").startswith("pallet.") or not event.get("barcode"):
+        return None
+
+    def as_uuid(value):
+        return uuid.UUID(value) if value else None
+
+    return {
+        "event_id": event["id"],
+        "occurred_at": datetime.fromtimestamp(event["ts"], tz=timezone.utc),
+        "event_type": event["type"],
+        "pallet_id": as_uuid(event.get("pallet_id")),
+        "barcode": event["barcode"],
+        "status": event.get("status"),
+        "weight": event.get("weight"),
+        "dock_id": as_uuid(event.get("dock_id")),
+        "dock_number": event.get("dock_number"),
+        "shipment_id": as_uuid(event.get("shipment_id")),
+    }
+
+
+async def _dead_letter(entries: list[tuple[str, dict]], reason: str) -> None:
+    logger.warning("Odkładam %d zdarzeń historii palet do %s: %s", len(entries), DEAD_LETTER_STREAM, reason)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for entry_id, fields in entries:
+            pipe.xadd(
+                DEAD_LETTER_STREAM,
+                {"source_id": entry_id, "data": fields.get("data", ""), "error": reason[:500]},
+                maxlen=DEAD_LETTER_MAXLEN,
+                approximate=True,
+            )
+        await pipe.execute()
+    await redis_client.xack(PALLET_HISTORY_STREAM, CONSUMER_GROUP, *[entry_id for entry_id, _ in entries])
+
+
+async def _insert_rows(rows: list[dict]) -> None:
+    await ensure_partitions_for(row["occurred_at"].date() for row in rows)
+    # ON CONFLICT: wpis odczytany ponownie po awarii (przed XACK) nie tworzy duplikatu
+    stmt = pg_insert(PalletEvent).values(rows).on_conflict_do_nothing()
+    async with AsyncSessionLocal() as db:
+        await db.execute(stmt)
+        await db.commit()
+
+
+def _parse(entries: list[tuple[str, dict]]) -> tuple[list[tuple[str, dict, Optional[dict]]], list[tuple[str, dict]]]:
+    """(wpis, wiersz lub None dla zdarzeń spoza historii); wpisy nieczytelne lub sprzed retencji osobno."""
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=PALLET_EVENTS_RETENTION_DAYS)
+    parsed, rejected = [], []
+    for entry_id, fields in entries:
+        try:
+            row = _to_row(decode_event(entry_id, fields))
+        except (KeyError, TypeError, ValueError):
+            rejected.append((entry_id, fields))
+            continue
+        # Dzień poza retencją: partycja odłączona (tabela o tej nazwie może istnieć) - nie ma gdzie zapisać
+        if row is not None and row["occurred_at"].date() < cutoff:
+            rejected.append((entry_id, fields))
+            continue
+        parsed.append((entry_id, fields, row))
+    return parsed, rejected
+
+
+async def _write_batch(entries: list[tuple[str, dict]]) -> None:
+    parsed, rejected = _parse(entries)
+    if rejected:
+        await _dead_letter(rejected, "nieczytelne zdarzenie lub dzień poza retencją")
+    rows = [row for _, _, row in parsed if row]
+    if rows:
+        await _insert_rows(rows)
+    await _ack_written([entry_id for entry_id, _, _ in parsed])
+
+
+async def _write_individually(entries: list[tuple[str, dict]]) -> None:
+    """
+    Paczka nie przechodzi mimo ponowień: zapis po jednym wpisie. Wpis, który nie przechodzi przy
+    działającej bazie, trafia do DEAD_LETTER_STREAM - jeden zły wpis nie blokuje historii.
+    Przy niedziałającej bazie wyjątek leci dalej, a bufor czeka na kolejną próbę.
+    """
+    parsed, rejected = _parse(entries)
+    if rejected:
+        await _dead_letter(rejected, "nieczytelne zdarzenie lub dzień poza retencją")
+    written = []
+    try:
+        for entry_id, fields, row in parsed:
+            if row is not None:
+                try:
+                    await _insert_rows([row])
+                except Exception as e:
+                    async with engine.connect() as conn:
+                        await conn.execute(text("SELECT 1"))  # awaria bazy - wyjątek stąd, bez odkładania
+                    await _dead_letter([(entry_id, fields)], str(e))
+                    continue
+            written.append(entry_id)
+    finally:
+        await _ack_written(written)
+
+
+async def _ack_written(entry_ids: list[str]) -> None:
+    if not entry_ids:
+        return
+    await redis_client.xack(PALLET_HISTORY_STREAM, CONSUMER_GROUP, *entry_ids)
+    try:
+        await _trim_acked()
+    except RedisError as e:
+        # Zapis się udał - nieprzycięty strumień dokończy następna paczka
+        logger.warning("Przycinanie strumienia historii palet nie powiodło się: %s", e)
+
+
+async def _trim_acked() -> None:
+    """
+    Strumień historii nie ma MAXLEN - przycinamy tylko to, co grupa już zapisała:
+    poniżej najstarszego niepotwierdzonego wpisu, a bez zaległych - do ostatnio doręczonego.
+    """
+    pending = await redis_client.xpending(PALLET_HISTORY_STREAM, CONSUMER_GROUP)
+    if pending["pending"]:
+        min_id = pending["min"]
+    else:
+        groups = await redis_client.xinfo_groups(PALLET_HISTORY_STREAM)
+        min_id = next((g["last-delivered-id"] for g in groups if g["name"] == CONSUMER_GROUP), None)
+    if min_id:
+        await redis_client.xtrim(PALLET_HISTORY_STREAM, minid=min_id, approximate=True)
+
+
+async def _ensure_group() -> None:
+    try:
+        # "0" - wszystko, co trafiło do strumienia historii przed pierwszym startem writera
+        await redis_client.xgroup_create(PALLET_HISTORY_STREAM, CONSUMER_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def run_pallet_event_writer() -> None:
+    """
+    Zadanie w tle (lifespan): czyta strumień historii palet w grupie konsumentów i zapisuje
+    zdarzenia palet do pallet_events paczkami (do PALLET_EVENTS_BATCH lub co PALLET_EVENTS_FLUSH_MS).
+    Skan nie czeka na zapis historii - publikuje tylko zdarzenie, jak dotychczas.
+    """
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    loop = asyncio.get_running_loop()
+    # Słownik po ID wpisu: XAUTOCLAIM po błędzie zwraca też nasze własne wpisy, które już są w buforze
+    buffer: dict[str, dict] = {}
+    deadline = None
+    claim_from = "0-0"
+    failures = 0
+
+    while True:
+        try:
+            if claim_from is not None:
+                await _ensure_group()
+                await ensure_partitions()
+                # Po starcie przejmujemy niepotwierdzone wpisy workerów, które padły
+                claim_from, claimed, *rest = await redis_client.xautoclaim(
+                    PALLET_HISTORY_STREAM, CONSUMER_GROUP, consumer, CLAIM_IDLE_MS,
+                    start_id=claim_from, count=PALLET_EVENTS_BATCH,
+                )
+                # Wpisy usunięte ze strumienia przed zapisem - tej historii już nie odtworzymy
+                deleted = list(rest[0]) if rest else []
+                deleted += [entry_id for entry_id, fields in claimed if not fields]
+                if deleted:
+                    logger.warning(
+                        "Utracone zdarzenia historii palet (%d usuniętych ze strumienia): %s",
+                        len(deleted), ", ".join(deleted[:20]),
+                    )
+                buffer.update((entry_id, fields) for entry_id, fields in claimed if fields)
+                if claim_from == "0-0":
+                    claim_from = None
+
+            if len(buffer) < PALLET_EVENTS_BATCH:
+                block_ms = PALLET_EVENTS_FLUSH_MS
+                if deadline is not None:
+                    block_ms = max(int((deadline - loop.time()) * 1000), 1)
+                response = await redis_client.xreadgroup(
+                    CONSUMER_GROUP, consumer, {PALLET_HISTORY_STREAM: ">"},
+                    count=PALLET_EVENTS_BATCH - len(buffer),
+                    block=block_ms,
+                )
+                for _stream, entries in response or []:
+                    buffer.update(entries)
+            if buffer and deadline is None:
+                deadline = loop.time() + PALLET_EVENTS_FLUSH_MS / 1000
+
+            if buffer and (len(buffer) >= PALLET_EVENTS_BATCH or loop.time() >= deadline):
+                if failures >= WRITE_ATTEMPTS_BEFORE_SPLIT:
+                    await _write_individually(list(buffer.items()))
+                else:
+                    await _write_batch(list(buffer.items()))
+                buffer, deadline, failures = {}, None, 0
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Bufor zostaje; po WRITE_ATTEMPTS_BEFORE_SPLIT próbach zapis po jednym wpisie odkłada te, które nie przechodzą
+            failures += 1
+            logger.warning(
+                "Zapis historii palet nie powiódł się (%d zdarzeń w buforze, próba %d): %s", len(buffer), failures, e,
+            )
+            claim_from = "0-0"
+            await asyncio.sleep(min(2 ** failures, 30))
+
+
+async def drain_pallet_history() -> int:
+    """
+    Jednorazowy zapis wszystkiego, co czeka w strumieniu historii (tryb cron, gdy writer nie działa
+    na workerach API). Najpierw wpisy porzucone przez inne procesy, potem nowe - aż do pustego strumienia.
+    Zwraca liczbę przetworzonych wpisów.
+    """
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    await _ensure_group()
+    drained = 0
+    claim_from = "0-0"
+    while True:
+        if claim_from is not None:
+            claim_from, entries, *_ = await redis_client.xautoclaim(
+                PALLET_HISTORY_STREAM, CONSUMER_GROUP, consumer, CLAIM_IDLE_MS,
+                start_id=claim_from, count=PALLET_EVENTS_BATCH,
+            )
+            entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+            if claim_from == "0-0":
+                claim_from = None
+        else:
+            response = await redis_client.xreadgroup(
+                CONSUMER_GROUP, consumer, {PALLET_HISTORY_STREAM: ">"}, count=PALLET_EVENTS_BATCH,
+            )
+            entries = [entry for _stream, items in response or [] for entry in items]
+            if not entries:
+                return drained
+        if not entries:
+            continue
+        try:
+            await _write_batch(entries)
+        except Exception as e:
+            logger.warning("Zapis paczki historii palet nie powiódł się, zapis pojedynczo: %s", e)
+            await _write_individually(entries)
+        drained += len(entries)
+
+
+def history_window(since: Optional[datetime], until: Optional[datetime]) -> tuple[datetime, datetime]:
+    """Okno czasowe zapytania - zawsze ograniczone, żeby Postgres przycinał partycje."""
+    def as_utc(value: datetime) -> datetime:
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+    until = as_utc(until) if until else datetime.now(timezone.utc)
+    since = as_utc(since) if since else until - timedelta(days=PALLET_EVENTS_HISTORY_DAYS)
+    return since, until
+
+
+async def get_pallet_history(
+    db: AsyncSession, barcode: str, since: datetime, until: datetime, limit: int
+) -> list[PalletEvent]:
+    query = (
+        select(PalletEvent)
+        .where(PalletEvent.barcode == barcode, PalletEvent.occurred_at >= since, PalletEvent.occurred_at < until)
+        .order_by(PalletEvent.occurred_at)
+        .limit(limit)
+    )
+    return (await db.execute(query)).scalars().all()
+
+
+async def get_dock_history(
+    db: AsyncSession, dock_number: str, since: datetime, until: datetime, limit: int
+) -> list[PalletEvent]:
+    query = (
+        select(PalletEvent)
+        .where(PalletEvent.dock_number == dock_number, PalletEvent.occurred_at >= since, PalletEvent.occurred_at < until)
+        .order_by(PalletEvent.occurred_at)
+        .limit(limit)
+    )
+    return (await db.execute(query)).scalars().all()
+
+
+async def main():
+    await ensure_partitions()
+    detached = await detach_old_partitions()
+    print(f"Partycje gotowe na {PALLET_EVENTS_PREMAKE_DAYS} dni naprzód, odłączono: {', '.join(detached) or 'brak'}")
+    drained = await drain_pallet_history()
+    print(f"Zapisano historię palet ze strumienia: {drained} zdarzeń")
+    await engine.dispose()
+
+
+# Uruchomienie z crona (gdy PALLET_EVENTS_WRITER=0 na workerach API): python -m app.services.pallet_events
+# Poza partycjami i retencją opróżnia strumień historii - cron musi chodzić częściej niż dobowo
+if __name__ == "__main__":
+    asyncio.run(main())
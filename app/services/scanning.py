@@ -0,0 +1,197 @@
+from fastapi import HTTPException
+from sqlalchemy import String, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dock import Dock
+from app.models.pallet import Pallet
+from app.models.shipment import Shipment
+from app.services.events import publish_event, publish_events
+
+
+async def scan_pallet_to_dock(db: AsyncSession, barcode: str, dock_number: str) -> dict:
+    """
+    Gorąca ścieżka skanu na rampę - dwa round-tripy do Postgresa zamiast pięciu:
+    1. paleta (FOR UPDATE) + rampa + aktywna trasa rampy jednym JOIN-em,
+    2. rezerwacja wagi na trasie i przypisanie palety jednym zapytaniem (UPDATE w CTE).
+    """
+    query = (
+        select(Pallet, Dock, Shipment)
+        .select_from(Pallet)
+        .join(Dock, Dock.number == dock_number)
+        .outerjoin(Shipment, Shipment.id == Dock.current_shipment_id)
+        .where(Pallet.barcode == barcode)
+        .with_for_update(of=Pallet)
+    )
+    row = (await db.execute(query)).one_or_none()
+
+    if row is None:
+        raise HTTPException(status_code=404, detail="Paleta lub Rampa nie istnieje")
+
+    pallet, dock, shipment = row
+
+    # SPRAWDZENIE: Czy paleta już jest na jakiejś rampie?
+    if pallet.current_dock_id is not None:
+        raise HTTPException(status_code=400, detail="Ta paleta została już przypisana do rampy!")
+
+    if shipment is None:
+        raise HTTPException(status_code=400, detail="Rampa nie ma przypisanej aktywnej trasy")
+
+    # WEIGHT GUARD: warunkowy UPDATE licznika trasy; paleta przypisywana tylko gdy rezerwacja przeszła
+    pallet_weight = pallet.weight or 0
+    reserved = (
+        update(Shipment)
+        .where(
+            Shipment.id == shipment.id,
+            Shipment.loaded_weight + pallet_weight <= Shipment.max_weight_capacity,
+        )
+        .values(
+            loaded_weight=Shipment.loaded_weight + pallet_weight,
+            pallet_count=Shipment.pallet_count + 1,
+        )
+        .returning(Shipment.id, Shipment.loaded_weight, Shipment.max_weight_capacity)
+        .cte("reserved")
+    )
+    assign_query = (
+        update(Pallet)
+        .where(Pallet.id == pallet.id, reserved.c.id == shipment.id)
+        .values(
+            current_dock_id=dock.id,
+            shipment_id=reserved.c.id,
+            status="LOADING_TO_DOCK",
+        )
+        .returning(reserved.c.loaded_weight, reserved.c.max_weight_capacity)
+        .execution_options(synchronize_session=False)
+    )
+    assigned = (await db.execute(assign_query)).one_or_none()
+
+    if assigned is None:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"PRZEŁADOWANIE! Obecna waga: {shipment.loaded_weight}kg, Nowa paleta: {pallet.weight}kg. Limit: {shipment.max_weight_capacity}kg"
+        )
+
+    await db.commit()
+    await publish_event(
+        "pallet.loaded",
+        pallet_id=pallet.id,
+        barcode=pallet.barcode,
+        status="LOADING_TO_DOCK",
+        weight=pallet_weight,
+        dock_id=dock.id,
+        dock_number=dock.number,
+        shipment_id=shipment.id,
+        reference_number=shipment.reference_number,
+        loaded_weight=assigned.loaded_weight,
+        max_weight_capacity=assigned.max_weight_capacity,
+    )
+    return {
+        "message": "Załadunek dozwolony", 
+        "current_total_weight": assigned.loaded_weight,
+        "capacity_left": assigned.max_weight_capacity - assigned.loaded_weight
+    }
+
+
+async def scan_pallets_to_dock(db: AsyncSession, barcodes: list[str], dock_number: str) -> dict:
+    """
+    Cały rząd palet na jedną rampę w jednej transakcji: wszystkie palety blokowane jednym
+    zapytaniem, waga sprawdzana raz dla sumy, jeden UPDATE palet i trasy, jeden commit.
+    Wszystko albo nic - przy przeładowaniu zwraca dokładnie te palety, które się nie mieszczą.
+    """
+    barcodes = list(dict.fromkeys(barcodes))
+
+    # 1. Palety FOR UPDATE w stałej kolejności (po id) - równoległe paczki nie zakleszczą się nawzajem
+    pallet_query = (
+        select(Pallet)
+        .where(Pallet.barcode == any_(bindparam("barcodes", barcodes, type_=ARRAY(String))))
+        .order_by(Pallet.id)
+        .with_for_update()
+    )
+    pallets = {pallet.barcode: pallet for pallet in (await db.execute(pallet_query)).scalars().all()}
+
+    dock = (await db.execute(select(Dock).where(Dock.number == dock_number))).scalar_one_or_none()
+    if dock is None:
+        raise HTTPException(status_code=404, detail="Rampa nie istnieje")
+
+    # 2. Trasę blokujemy po paletach - ta sama kolejność co w pojedynczym skanie
+    shipment = None
+    if dock.current_shipment_id is not None:
+        shipment_query = select(Shipment).where(Shipment.id == dock.current_shipment_id).with_for_update()
+        shipment = (await db.execute(shipment_query)).scalar_one_or_none()
+
+    missing = [barcode for barcode in barcodes if barcode not in pallets]
+    if missing:
+        raise HTTPException(status_code=404, detail={"message": "Palety nie istnieją", "barcodes": missing})
+
+    already_assigned = [barcode for barcode in barcodes if pallets[barcode].current_dock_id is not None]
+    if already_assigned:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Palety zostały już przypisane do rampy!", "barcodes": already_assigned},
+        )
+
+    if shipment is None:
+        raise HTTPException(status_code=400, detail="Rampa nie ma przypisanej aktywnej trasy")
+
+    # WEIGHT GUARD raz dla całej paczki; narastająco w kolejności skanu - widać, od której palety brakuje miejsca
+    capacity_left = shipment.max_weight_capacity - shipment.loaded_weight
+    running, overflow = 0, []
+    for barcode in barcodes:
+        running += pallets[barcode].weight or 0
+        if running > capacity_left:
+            overflow.append(barcode)
+
+    if overflow:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": f"PRZEŁADOWANIE! Obecna waga: {shipment.loaded_weight}kg, Paczka: {running}kg. Limit: {shipment.max_weight_capacity}kg",
+                "barcodes": overflow,
+                "current_total_weight": shipment.loaded_weight,
+                "batch_weight": running,
+                "capacity_left": capacity_left,
+            },
+        )
+
+    # 3. Jeden UPDATE palet i jeden UPDATE liczników trasy, jeden commit
+    pallet_ids = [pallets[barcode].id for barcode in barcodes]
+    await db.execute(
+        update(Pallet)
+        .where(Pallet.id.in_(pallet_ids))
+        .values(current_dock_id=dock.id, shipment_id=shipment.id, status="LOADING_TO_DOCK")
+        .execution_options(synchronize_session=False)
+    )
+    totals = (await db.execute(
+        update(Shipment)
+        .where(Shipment.id == shipment.id)
+        .values(
+            loaded_weight=Shipment.loaded_weight + running,
+            pallet_count=Shipment.pallet_count + len(barcodes),
+        )
+        .returning(Shipment.loaded_weight, Shipment.max_weight_capacity)
+        .execution_options(synchronize_session=False)
+    )).one()
+    await db.commit()
+
+    await publish_events("pallet.loaded", [
+        {
+            "pallet_id": pallets[barcode].id,
+            "barcode": barcode,
+            "status": "LOADING_TO_DOCK",
+            "weight": pallets[barcode].weight or 0,
+            "dock_id": dock.id,
+            "dock_number": dock.number,
+            "shipment_id": shipment.id,
+            "reference_number": shipment.reference_number,
+            "loaded_weight": totals.loaded_weight,
+            "max_weight_capacity": totals.max_weight_capacity,
+        }
+        for barcode in barcodes
+    ])
+    return {
+        "message": "Załadunek dozwolony",
+        "pallet_count": len(barcodes),
+        "batch_weight": running,
+        "current_total_weight": totals.loaded_weight,
+        "capacity_left": totals.max_weight_capacity - totals.loaded_weight,
+    }
@@ -0,0 +1,63 @@
+import asyncio
+
+from sqlalchemy import select, update, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.pallet import Pallet
+from app.models.shipment import Shipment
+
+
+async def reconcile_load_counters(db: AsyncSession) -> list[dict]:
+    """
+    Przelicza loaded_weight / pallet_count z tabeli palet i naprawia rozjazdy.
+    Zwraca listę poprawionych tras.
+    """
+    # Najpierw blokada tras (FOR UPDATE, stała kolejność): skan trzyma blokadę trasy do commita,
+    # więc po jej uzyskaniu żaden skan nie jest w połowie, a kolejny UPDATE (nowy snapshot
+    # w READ COMMITTED) liczy SUM/COUNT z aktualnych palet. Bez tego UPDATE czekający na
+    # blokadę wiersza zapisałby sumy ze starego snapshotu i sam zrobiłby rozjazd.
+    await db.execute(select(Shipment.id).order_by(Shipment.id).with_for_update())
+
+    actual_weight = (
+        select(func.coalesce(func.sum(Pallet.weight), 0))
+        .where(Pallet.shipment_id == Shipment.id)
+        .scalar_subquery()
+    )
+    actual_count = (
+        select(func.count(Pallet.id))
+        .where(Pallet.shipment_id == Shipment.id)
+        .scalar_subquery()
+    )
+
+    query = (
+        update(Shipment)
+        .where(or_(Shipment.loaded_weight != actual_weight, Shipment.pallet_count != actual_count))
+        .values(loaded_weight=actual_weight, pallet_count=actual_count)
+        .returning(Shipment.reference_number, Shipment.loaded_weight, Shipment.pallet_count)
+        .execution_options(synchronize_session=False)
+    )
+    repaired = (await db.execute(query)).all()
+    await db.commit()
+
+    return [
+        {
+            "reference_number": row.reference_number,
+            "loaded_weight": row.loaded_weight,
+            "pallet_count": row.pallet_count,
+        }
+        for row in repaired
+    ]
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        repaired = await reconcile_load_counters(session)
+    print(f"Naprawiono liczniki {len(repaired)} tras")
+    for row in repaired:
+        print(f"- {row['reference_number']}: {row['loaded_weight']}kg / {row['pallet_count']} palet")
+
+
+# Uruchomienie z crona: python -m app.services.shipment_load
+if __name__ == "__main__":
+    asyncio.run(main())
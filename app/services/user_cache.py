@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+from redis.exceptions import RedisError
+
+from app.models.user import User
+from app.redis_client import redis_client
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "1024"))
+# Kanał Redis, przez który workery informują się nawzajem o zmianie użytkownika
+USER_CACHE_INVALIDATION = os.getenv("USER_CACHE_INVALIDATION", "1") == "1"
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+INVALIDATE_ALL = "*"
+
+
+class UserCache:
+    """LRU z TTL: username (sub z tokena) -> odłączony obiekt User."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str) -> Optional[User]:
+        entry = self._entries.get(username)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(username, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(username)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, username: str, user: User) -> None:
+        self._entries[username] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        if username is None or username == INVALIDATE_ALL:
+            self._entries.clear()
+        else:
+            self._entries.pop(username, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+user_cache = UserCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL)
+
+
+async def invalidate_user(username: Optional[str] = None) -> None:
+    """Usuwa użytkownika z lokalnego cache i (opcjonalnie) z cache pozostałych workerów."""
+    user_cache.invalidate(username)
+    if not USER_CACHE_INVALIDATION:
+        return
+    try:
+        await redis_client.publish(INVALIDATION_CHANNEL, username or INVALIDATE_ALL)
+    except RedisError as e:
+        # Pozostałe workery i tak odświeżą wpis po USER_CACHE_TTL
+        logger.warning("Nie udało się opublikować unieważnienia cache: %s", e)
+
+
+async def run_invalidation_listener() -> None:
+    """Zadanie w tle (lifespan): nasłuchuje unieważnień z innych workerów."""
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    user_cache.invalidate(message["data"])
+        except RedisError as e:
+            # Bez kanału nie wiemy, co przegapiliśmy - czyścimy cache i próbujemy ponownie
+            logger.warning("Utracono kanał unieważnień cache użytkowników: %s", e)
+            user_cache.invalidate()
+            await asyncio.sleep(5)
+        finally:
+            await pubsub.aclose()
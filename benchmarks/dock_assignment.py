@@ -0,0 +1,128 @@
+"""
+Przydział ramp w pamięci (bez bazy): plan_assignment vs naiwny "pierwsza pasująca rampa
+w kolejności zgłoszeń" na losowym placu. Raport: czas planu, liczba przydziałów,
+suma priorytetów obsłużonych tras i udział ramp dokładnie dopasowanego typu.
+
+    python -m benchmarks.dock_assignment --docks 500 --shipments 5000 --rounds 20
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.models.dock import Dock, DockType
+from app.models.shipment import Shipment
+from app.services.dock_assignment import DOCK_COMPATIBILITY, AssignmentPlan, plan_assignment
+
+# Udział typów na placu i w zamówieniach (chłodnie rzadkie, ale potrzebne)
+DOCK_MIX = {DockType.STANDARD: 0.6, DockType.COLD_CHAIN: 0.2, DockType.VAN_ACCESS: 0.2}
+SHIPMENT_MIX = {DockType.STANDARD: 0.5, DockType.COLD_CHAIN: 0.3, DockType.VAN_ACCESS: 0.2}
+
+
+def build_yard(docks: int, shipments: int, rng: random.Random) -> tuple[list[Dock], list[Shipment]]:
+    def pick(mix: dict) -> DockType:
+        return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+    dock_rows = [Dock(id=uuid.uuid4(), number=f"R-{i:04d}", dock_type=pick(DOCK_MIX)) for i in range(docks)]
+    start = datetime.now(timezone.utc)
+    shipment_rows = [
+        Shipment(
+            id=uuid.uuid4(),
+            reference_number=f"TR-{i:05d}",
+            required_dock_type=pick(SHIPMENT_MIX),
+            priority=rng.randint(0, 10),
+            created_at=start + timedelta(seconds=rng.randint(0, 3600)),
+        )
+        for i in range(shipments)
+    ]
+    return dock_rows, shipment_rows
+
+
+def naive_assignment(docks: list[Dock], shipments: list[Shipment]) -> AssignmentPlan:
+    """Dotychczasowa praktyka ręczna: kolejność zgłoszeń, pierwsza wolna pasująca rampa."""
+    free = sorted(docks, key=lambda d: d.number)
+    pairs, unassigned = [], []
+    for shipment in sorted(shipments, key=lambda s: s.created_at):
+        allowed = DOCK_COMPATIBILITY[shipment.required_dock_type]
+        dock = next((d for d in free if d.dock_type in allowed), None)
+        if dock is None:
+            unassigned.append(shipment)
+            continue
+        free.remove(dock)
+        pairs.append((dock, shipment))
+    return AssignmentPlan(pairs=pairs, unassigned=unassigned, free_docks=free)
+
+
+def check_plan(plan: AssignmentPlan, docks: list[Dock], shipments: list[Shipment]) -> None:
+    used_docks = [dock.id for dock, _ in plan.pairs]
+    used_shipments = [shipment.id for _, shipment in plan.pairs]
+    assert len(set(used_docks)) == len(used_docks), "rampa przydzielona dwa razy"
+    assert len(set(used_shipments)) == len(used_shipments), "trasa przydzielona dwa razy"
+    assert all(dock.dock_type in DOCK_COMPATIBILITY[s.required_dock_type] for dock, s in plan.pairs), "niezgodny typ rampy"
+    assert len(plan.pairs) + len(plan.unassigned) == len(shipments)
+    assert len(plan.pairs) + len(plan.free_docks) == len(docks)
+
+
+def measure(strategy, docks, shipments) -> tuple[AssignmentPlan, float]:
+    started = time.perf_counter()
+    plan = strategy(docks, shipments)
+    return plan, (time.perf_counter() - started) * 1000
+
+
+def summarize(plan: AssignmentPlan) -> dict:
+    exact = sum(1 for dock, shipment in plan.pairs if dock.dock_type == shipment.required_dock_type)
+    return {
+        "assigned": len(plan.pairs),
+        "priority_sum": sum(shipment.priority for _, shipment in plan.pairs),
+        "exact_match": round(exact / len(plan.pairs), 3) if plan.pairs else 0.0,
+    }
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    strategies = {"optimizer": plan_assignment, "naive": naive_assignment}
+    timings = {name: [] for name in strategies}
+    results = {name: [] for name in strategies}
+
+    for _ in range(args.rounds):
+        docks, shipments = build_yard(args.docks, args.shipments, rng)
+        for name, strategy in strategies.items():
+            plan, elapsed_ms = measure(strategy, docks, shipments)
+            check_plan(plan, docks, shipments)
+            timings[name].append(elapsed_ms)
+            results[name].append(summarize(plan))
+
+    report = {"params": vars(args), "strategies": {}}
+    print(f"{args.docks} ramp x {args.shipments} tras, {args.rounds} losowań\n")
+    print(f"{'strategia':<12}{'p50 ms':>10}{'max ms':>10}{'przydz.':>10}{'suma prior.':>13}{'dokładne':>10}")
+    for name in strategies:
+        row = {
+            "p50_ms": round(statistics.median(timings[name]), 3),
+            "max_ms": round(max(timings[name]), 3),
+            "assigned": statistics.mean(r["assigned"] for r in results[name]),
+            "priority_sum": statistics.mean(r["priority_sum"] for r in results[name]),
+            "exact_match": round(statistics.mean(r["exact_match"] for r in results[name]), 3),
+        }
+        report["strategies"][name] = row
+        print(
+            f"{name:<12}{row['p50_ms']:>10}{row['max_ms']:>10}{row['assigned']:>10.0f}"
+            f"{row['priority_sum']:>13.0f}{row['exact_match']:>10.1%}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nZapisano: {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark przydziału ramp do oczekujących tras")
+    parser.add_argument("--docks", type=int, default=500)
+    parser.add_argument("--shipments", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="plik JSON z raportem")
+    main(parser.parse_args())
@@ -0,0 +1,101 @@
+"""
+Plan załadunku w pamięci (bez bazy): wektorowe first_fit_decreasing na losowych
+paletach i trasach. Raport: czas planu, udział zaplanowanych palet i wagi, rozkład
+wypełnienia tras. --verify porównuje wynik z prostą pętlą FFD (na mniejszej próbce).
+
+    python -m benchmarks.load_planning --pallets 100000 --shipments 2000 --rounds 5
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+
+from app.services.load_planning import first_fit_decreasing
+
+
+def build_load(pallets: int, shipments: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    # Palety 50-1200 kg, trasy: solówki 6 t, naczepy 12 t i 24 t, część już częściowo załadowana
+    weights = rng.integers(50, 1201, size=pallets)
+    capacities = rng.choice([6000, 12000, 24000], size=shipments, p=[0.2, 0.5, 0.3])
+    loaded = (capacities * rng.uniform(0, 0.5, size=shipments)).astype(np.int64)
+    return weights, capacities - loaded
+
+
+def reference_ffd(weights: np.ndarray, capacities: np.ndarray) -> np.ndarray:
+    """Podręcznikowe FFD paleta po palecie - wzorzec poprawności dla wersji wektorowej."""
+    remaining = [int(c) for c in capacities]
+    result = np.full(weights.size, -1, dtype=np.int64)
+    for index in sorted(range(weights.size), key=lambda i: -int(weights[i])):
+        for bin_id, free in enumerate(remaining):
+            if free >= weights[index]:
+                remaining[bin_id] -= int(weights[index])
+                result[index] = bin_id
+                break
+    return result
+
+
+def check_plan(assignment: np.ndarray, weights: np.ndarray, capacities: np.ndarray) -> None:
+    placed = assignment >= 0
+    planned = np.bincount(assignment[placed], weights=weights[placed], minlength=capacities.size)
+    assert (planned <= capacities).all(), "trasa przeładowana"
+    if (~placed).any():
+        # FFD: niezaplanowana paleta nie mieści się w żadnej trasie po rozłożeniu pozostałych
+        assert weights[~placed].min() > (capacities - planned).max(), "paleta pominięta mimo miejsca"
+
+
+def main(args) -> None:
+    rng = np.random.default_rng(args.seed)
+    timings, placed_share, weight_share, fills = [], [], [], []
+
+    for _ in range(args.rounds):
+        weights, capacities = build_load(args.pallets, args.shipments, rng)
+        started = time.perf_counter()
+        assignment = first_fit_decreasing(weights, capacities)
+        timings.append((time.perf_counter() - started) * 1000)
+        check_plan(assignment, weights, capacities)
+
+        placed = assignment >= 0
+        planned = np.bincount(assignment[placed], weights=weights[placed], minlength=capacities.size)
+        placed_share.append(placed.mean())
+        weight_share.append(weights[placed].sum() / weights.sum())
+        fills.append(planned / np.maximum(capacities, 1))
+
+    fill = np.concatenate(fills)
+    report = {
+        "params": vars(args),
+        "p50_ms": round(statistics.median(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "placed_pallets": round(float(np.mean(placed_share)), 4),
+        "placed_weight": round(float(np.mean(weight_share)), 4),
+        "fill_p10": round(float(np.percentile(fill, 10)), 4),
+        "fill_p50": round(float(np.percentile(fill, 50)), 4),
+        "fill_min": round(float(fill.min()), 4),
+    }
+
+    print(f"{args.pallets} palet x {args.shipments} tras, {args.rounds} losowań\n")
+    print(f"czas planu: p50 {report['p50_ms']} ms, max {report['max_ms']} ms")
+    print(f"zaplanowane palety: {report['placed_pallets']:.1%}, waga: {report['placed_weight']:.1%}")
+    print(f"wypełnienie tras: min {report['fill_min']:.1%}, p10 {report['fill_p10']:.1%}, p50 {report['fill_p50']:.1%}")
+
+    if args.verify:
+        weights, capacities = build_load(args.verify, max(args.verify // 50, 1), rng)
+        assert (first_fit_decreasing(weights, capacities) == reference_ffd(weights, capacities)).all()
+        print(f"\nZgodność z pętlą FFD na {args.verify} paletach: OK")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nZapisano: {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark planu załadunku palet STAGED")
+    parser.add_argument("--pallets", type=int, default=100000)
+    parser.add_argument("--shipments", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verify", type=int, default=0, help="liczba palet do porównania z pętlą FFD (0 = pomiń)")
+    parser.add_argument("--output", help="plik JSON z raportem")
+    main(parser.parse_args())
@@ -0,0 +1,113 @@
+"""
+Benchmark wpływu logowań (bcrypt) na inne żądania tego samego workera.
+
+W trakcie fali logowań co 5 ms przychodzi lekkie żądanie (ping); mierzymy
+jego p50/p99 - raz dla bcrypt liczonego w pętli zdarzeń (stara ścieżka),
+raz dla bcrypt w puli wątków (verify_password_async). Działa w pamięci
+przez ASGI - nie wymaga Postgresa ani Redisa.
+
+    python -m benchmarks.login_burst --logins 40 --spread 2.0
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.auth import get_password_hash, verify_password, verify_password_async, PASSWORD_HASH_WORKERS
+
+PASSWORD = "shift-change-1234"
+PING_INTERVAL = 0.005
+
+
+def build_app() -> FastAPI:
+    hashed = get_password_hash(PASSWORD)
+    bench_app = FastAPI()
+
+    @bench_app.post("/login-blocking")
+    async def login_blocking():
+        return {"ok": verify_password(PASSWORD, hashed)}
+
+    @bench_app.post("/login-offloaded")
+    async def login_offloaded():
+        return {"ok": await verify_password_async(PASSWORD, hashed)}
+
+    @bench_app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return bench_app
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * pct) - 1, 0)]
+
+
+async def run_burst(client: httpx.AsyncClient, login_path: str, logins: int, spread: float) -> dict:
+    ping_latencies = []
+    logins_done = asyncio.Event()
+
+    async def ping(scheduled_at: float):
+        await client.get("/ping")
+        # Liczymy od planowanego momentu przyjścia żądania - zablokowana pętla
+        # opóźnia też samo wysłanie, a klient w sieci by na to nie czekał
+        ping_latencies.append(time.perf_counter() - scheduled_at)
+
+    async def pinger():
+        pings = []
+        started = time.perf_counter()
+        while not logins_done.is_set():
+            scheduled_at = started + len(pings) * PING_INTERVAL
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Po zablokowaniu pętli nadrabiamy wszystkie zaległe pingi naraz
+            pings.append(asyncio.create_task(ping(scheduled_at)))
+        await asyncio.gather(*pings)
+
+    async def login(i: int):
+        # Handheldy logują się w ciągu `spread` sekund, nie w jednej chwili
+        await asyncio.sleep(i * spread / logins)
+        await client.post(login_path)
+
+    async def burst():
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        logins_done.set()
+
+    started = time.perf_counter()
+    await asyncio.gather(pinger(), burst())
+    elapsed = time.perf_counter() - started
+
+    return {
+        "login_path": login_path,
+        "logins": logins,
+        "pings": len(ping_latencies),
+        "elapsed_s": round(elapsed, 2),
+        "ping_p50_ms": round(statistics.median(ping_latencies) * 1000, 2),
+        "ping_p99_ms": round(percentile(ping_latencies, 0.99) * 1000, 2),
+        "ping_max_ms": round(max(ping_latencies) * 1000, 2),
+    }
+
+
+async def main(args) -> None:
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = [
+            await run_burst(client, path, args.logins, args.spread)
+            for path in ("/login-blocking", "/login-offloaded")
+        ]
+
+    print(f"Pula bcrypt: {PASSWORD_HASH_WORKERS} wątków")
+    print(f"{'ścieżka':<20}{'czas s':>8}{'pingi':>8}{'ping p50':>10}{'ping p99':>10}{'ping max':>10}")
+    for r in results:
+        print(f"{r['login_path']:<20}{r['elapsed_s']:>8}{r['pings']:>8}{r['ping_p50_ms']:>10}{r['ping_p99_ms']:>10}{r['ping_max_ms']:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p99 zwykłych żądań w trakcie fali logowań")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--spread", type=float, default=2.0, help="w ilu sekundach przychodzą logowania")
+    asyncio.run(main(parser.parse_args()))
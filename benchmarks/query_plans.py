@@ -0,0 +1,208 @@
+"""
+Regresja planów zapytań dla gorących ścieżek: seeduje magazyn, robi ANALYZE
+i sprawdza EXPLAIN każdego zapytania - Seq Scan na dużej tabeli = błąd (kod wyjścia 1).
+
+Wymaga lokalnego Postgresa po `alembic upgrade head` (konfiguracja z app.database).
+
+    python -m benchmarks.query_plans --shipments 5000 --pallets 100000
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import uuid
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.database import AsyncSessionLocal, engine
+from app.models.dock import Dock
+from app.models.pallet import Pallet
+from app.models.shipment import Shipment, ShipmentStatus
+
+# Tabele, na których sekwencyjny skan w gorącym zapytaniu oznacza brak indeksu
+CHECKED_TABLES = {"pallets", "docks", "shipments"}
+ACTIVE_STATUSES = (ShipmentStatus.PENDING, ShipmentStatus.IN_PROGRESS)
+
+
+async def seed(prefix: str, shipments: int, pallets: int, rng: random.Random) -> dict:
+    """
+    ~10% tras aktywnych z rampą, ~2% odebranych (COLLECTED), reszta w archiwum (SHIPPED);
+    palety rozłożone po trasach, 1/5 bez trasy (STAGED).
+    """
+    shipment_rows, dock_rows = [], []
+    for i in range(shipments):
+        shipment_id = uuid.uuid4()
+        active = i % 10 == 0
+        if active:
+            status = ShipmentStatus.IN_PROGRESS
+        elif i % 50 == 5:
+            status = ShipmentStatus.COLLECTED
+        else:
+            status = ShipmentStatus.SHIPPED
+        shipment_rows.append({
+            "id": shipment_id,
+            "reference_number": f"{prefix}-TR-{i}",
+            "origin": "PLAN",
+            "destination": "PLAN",
+            "status": status,
+            "max_weight_capacity": 10**9,
+        })
+        if active:
+            dock_rows.append({
+                "id": uuid.uuid4(),
+                "number": f"{prefix}-R-{i}",
+                "is_occupied": True,
+                "current_shipment_id": shipment_id,
+            })
+
+    # Rampy archiwalne (bez trasy) - większość tabeli docks, jak w prawdziwym magazynie po zmianie
+    for i in range(len(dock_rows) * 4):
+        dock_rows.append({
+            "id": uuid.uuid4(),
+            "number": f"{prefix}-RW-{i}",
+            "is_occupied": False,
+            "current_shipment_id": None,
+        })
+
+    pallet_rows = []
+    for i in range(pallets):
+        loaded = i % 5 != 0
+        shipment = rng.choice(shipment_rows) if loaded else None
+        pallet_rows.append({
+            "id": uuid.uuid4(),
+            "barcode": f"{prefix}-P-{i}",
+            "weight": rng.randint(100, 900),
+            "status": "LOADING_TO_DOCK" if loaded else "STAGED",
+            "shipment_id": shipment["id"] if shipment else None,
+            "current_dock_id": rng.choice(dock_rows)["id"] if loaded else None,
+        })
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Shipment), shipment_rows)
+        await db.execute(insert(Dock), dock_rows)
+        for start in range(0, len(pallet_rows), 10_000):
+            await db.execute(insert(Pallet), pallet_rows[start:start + 10_000])
+        await db.commit()
+
+    active = next(row for row in shipment_rows if row["status"] == ShipmentStatus.IN_PROGRESS)
+    return {
+        "shipment_id": active["id"],
+        "dock_id": dock_rows[0]["id"],
+        "dock_number": dock_rows[0]["number"],
+        "barcode": pallet_rows[0]["barcode"],
+    }
+
+
+async def cleanup(prefix: str) -> None:
+    pattern = f"{prefix}-%"
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Pallet).where(Pallet.barcode.like(pattern)))
+        await db.execute(delete(Dock).where(Dock.number.like(pattern)))
+        await db.execute(delete(Shipment).where(Shipment.reference_number.like(pattern)))
+        await db.commit()
+
+
+def hot_queries(sample: dict) -> dict:
+    """Zapytania z gorących ścieżek, w tej samej postaci co w kodzie aplikacji."""
+    return {
+        # reconcile_load_counters / dashboard: waga i liczba palet trasy
+        "shipment_weight_sum": select(func.coalesce(func.sum(Pallet.weight), 0)).where(
+            Pallet.shipment_id == sample["shipment_id"]
+        ),
+        "shipment_pallet_count": select(func.count()).select_from(Pallet).where(
+            Pallet.shipment_id == sample["shipment_id"]
+        ),
+        # release_dock_and_start_transport: rampa po aktywnej trasie
+        "dock_by_shipment": select(Dock).where(Dock.current_shipment_id == sample["shipment_id"]),
+        # palety stojące na rampie
+        "pallets_on_dock": select(Pallet.id).where(Pallet.current_dock_id == sample["dock_id"]),
+        # scan_pallet_to_dock: paleta + rampa + trasa jednym JOIN-em
+        "scan_join": (
+            select(Pallet, Dock, Shipment)
+            .select_from(Pallet)
+            .join(Dock, Dock.number == sample["dock_number"])
+            .outerjoin(Shipment, Shipment.id == Dock.current_shipment_id)
+            .where(Pallet.barcode == sample["barcode"])
+        ),
+        # dashboard: load-summary?status=COLLECTED
+        "collected_load_summary": load_summary_query([ShipmentStatus.COLLECTED]),
+        # load-summary?status=PENDING&status=IN_PROGRESS
+        "active_load_summary": load_summary_query(ACTIVE_STATUSES),
+    }
+
+
+def load_summary_query(statuses):
+    """To samo zapytanie co GET /shipments/load-summary z filtrem statusu."""
+    fill_percent = func.round(
+        Shipment.loaded_weight * 100.0 / func.nullif(Shipment.max_weight_capacity, 0), 1
+    )
+    return select(
+        Shipment.id,
+        Shipment.reference_number,
+        Shipment.origin,
+        Shipment.destination,
+        Shipment.status,
+        Shipment.pallet_count,
+        Shipment.loaded_weight,
+        Shipment.max_weight_capacity,
+        func.coalesce(fill_percent, 0).label("fill_percent"),
+    ).order_by(Shipment.created_at, Shipment.id).where(Shipment.status.in_(statuses))
+
+
+def seq_scans(plan: dict) -> list[str]:
+    """Tabele z CHECKED_TABLES czytane sekwencyjnie gdziekolwiek w drzewie planu."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in CHECKED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def node_types(plan: dict) -> list[str]:
+    nodes = [plan["Node Type"] + (f" ({plan['Index Name']})" if "Index Name" in plan else "")]
+    for child in plan.get("Plans", []):
+        nodes.extend(node_types(child))
+    return nodes
+
+
+async def explain_all(sample: dict) -> list[dict]:
+    results = []
+    async with AsyncSessionLocal() as db:
+        for name, query in hot_queries(sample).items():
+            sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            raw = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar_one()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            results.append({"query": name, "seq_scans": seq_scans(plan), "nodes": node_types(plan)})
+    return results
+
+
+async def main(args) -> int:
+    prefix = f"PLAN-{uuid.uuid4().hex[:8]}"
+    try:
+        sample = await seed(prefix, args.shipments, args.pallets, random.Random(args.seed))
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE pallets, docks, shipments"))
+        results = await explain_all(sample)
+    finally:
+        await cleanup(prefix)
+        await engine.dispose()
+
+    failed = [result for result in results if result["seq_scans"]]
+    for result in results:
+        verdict = "FAIL" if result["seq_scans"] else "OK"
+        print(f"{verdict:<5}{result['query']:<24}{' -> '.join(result['nodes'])}")
+    if failed:
+        print(f"\nSeq Scan w {len(failed)} zapytaniach: " + ", ".join(r["query"] for r in failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regresja planów zapytań (EXPLAIN) dla gorących ścieżek")
+    parser.add_argument("--shipments", type=int, default=5000)
+    parser.add_argument("--pallets", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    sys.exit(asyncio.run(main(parser.parse_args())))
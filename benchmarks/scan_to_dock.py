@@ -0,0 +1,166 @@
+"""
+Benchmark gorącej ścieżki scan-to-dock: stara ścieżka (5 zapytań, SUM wag)
+vs nowa (JOIN z FOR UPDATE + rezerwacja wagi i przypisanie w jednym UPDATE)
+vs paczka - cały rząd palet na rampę w jednej transakcji (--row-size palet).
+
+Wymaga lokalnego Postgresa po `alembic upgrade head` (konfiguracja z app.database).
+Redis jest pomijany - mierzymy wyłącznie pracę bazy.
+
+    python -m benchmarks.scan_to_dock --scans 2000 --concurrency 20 --docks 20 --row-size 33
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+
+from app.database import AsyncSessionLocal
+from app.models.dock import Dock
+from app.models.pallet import Pallet
+from app.models.shipment import Shipment, ShipmentStatus
+from app.services.scanning import scan_pallet_to_dock, scan_pallets_to_dock
+
+
+async def legacy_scan(db, barcode: str, dock_number: str) -> dict:
+    """Ścieżka sprzed zmiany - odtworzona 1:1 jako punkt odniesienia."""
+    pallet = (await db.execute(select(Pallet).where(Pallet.barcode == barcode).with_for_update())).scalar_one_or_none()
+    pallet = (await db.execute(select(Pallet).where(Pallet.barcode == barcode))).scalar_one_or_none()
+    if pallet and pallet.current_dock_id is not None:
+        raise HTTPException(status_code=400, detail="Ta paleta została już przypisana do rampy!")
+
+    dock = (await db.execute(select(Dock).where(Dock.number == dock_number))).scalar_one_or_none()
+    if not pallet or not dock:
+        raise HTTPException(status_code=404, detail="Paleta lub Rampa nie istnieje")
+    if not dock.current_shipment_id:
+        raise HTTPException(status_code=400, detail="Rampa nie ma przypisanej aktywnej trasy")
+
+    shipment = (await db.execute(select(Shipment).where(Shipment.id == dock.current_shipment_id))).scalar_one_or_none()
+    current_weight = (await db.execute(select(func.sum(Pallet.weight)).where(Pallet.shipment_id == shipment.id))).scalar() or 0
+    new_total_weight = current_weight + (pallet.weight or 0)
+    if new_total_weight > shipment.max_weight_capacity:
+        raise HTTPException(status_code=400, detail="PRZEŁADOWANIE!")
+
+    pallet.current_dock_id = dock.id
+    pallet.shipment_id = shipment.id
+    pallet.status = "LOADING_TO_DOCK"
+    await db.commit()
+    return {"current_total_weight": new_total_weight}
+
+
+async def seed(prefix: str, docks: int, scans: int) -> list[tuple[str, str]]:
+    """Tworzy rampy z aktywnymi trasami i palety STAGED; zwraca pary (barcode, dock_number)."""
+    async with AsyncSessionLocal() as db:
+        dock_numbers = []
+        for i in range(docks):
+            shipment = Shipment(
+                reference_number=f"{prefix}-TR-{i}",
+                origin="BENCH",
+                destination="BENCH",
+                status=ShipmentStatus.IN_PROGRESS,
+                max_weight_capacity=10**9,
+            )
+            db.add(shipment)
+            await db.flush()
+            dock = Dock(number=f"{prefix}-R-{i}", is_occupied=True, current_shipment_id=shipment.id)
+            db.add(dock)
+            dock_numbers.append(dock.number)
+
+        jobs = []
+        for i in range(scans):
+            barcode = f"{prefix}-P-{i}"
+            db.add(Pallet(barcode=barcode, weight=500))
+            jobs.append((barcode, dock_numbers[i % docks]))
+        await db.commit()
+    return jobs
+
+
+async def cleanup(prefix: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Pallet).where(Pallet.barcode.like(f"{prefix}-%")))
+        await db.execute(delete(Dock).where(Dock.number.like(f"{prefix}-%")))
+        await db.execute(delete(Shipment).where(Shipment.reference_number.like(f"{prefix}-%")))
+        await db.commit()
+
+
+async def run_variant(name: str, scan_fn, jobs: list[tuple[str, str]], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(barcode: str, dock_number: str):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await scan_fn(db, barcode, dock_number)
+            except HTTPException:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(barcode, dock_number) for barcode, dock_number in jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "variant": name,
+        "scans": len(jobs),
+        "errors": errors,
+        "scans_per_sec": round(len(jobs) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+async def run_batch_variant(name: str, jobs: list[tuple[str, str]], concurrency: int, row_size: int) -> dict:
+    """Palety grupowane po rampie w rzędy po row_size - jedno wywołanie paczki na rząd."""
+    by_dock: dict[str, list[str]] = {}
+    for barcode, dock_number in jobs:
+        by_dock.setdefault(dock_number, []).append(barcode)
+    rows = [
+        (barcodes[i:i + row_size], dock_number)
+        for dock_number, barcodes in by_dock.items()
+        for i in range(0, len(barcodes), row_size)
+    ]
+
+    result = await run_variant(name, scan_pallets_to_dock, rows, concurrency)
+    # Przepustowość liczona w paletach, nie w wywołaniach; p50/p99 dotyczą całego rzędu
+    result["scans_per_sec"] = round(result["scans_per_sec"] * len(jobs) / max(len(rows), 1), 1)
+    result["scans"] = len(jobs)
+    return result
+
+
+async def main(args) -> None:
+    variants = [("before (5 zapytań)", legacy_scan), ("after (JOIN + CTE)", scan_pallet_to_dock)]
+    results = []
+    for name, scan_fn in variants:
+        prefix = f"BENCH-{uuid.uuid4().hex[:8]}"
+        try:
+            jobs = await seed(prefix, args.docks, args.scans)
+            results.append(await run_variant(name, scan_fn, jobs, args.concurrency))
+        finally:
+            await cleanup(prefix)
+
+    prefix = f"BENCH-{uuid.uuid4().hex[:8]}"
+    try:
+        jobs = await seed(prefix, args.docks, args.scans)
+        results.append(await run_batch_variant(f"batch ({args.row_size} palet)", jobs, args.concurrency, args.row_size))
+    finally:
+        await cleanup(prefix)
+
+    print(f"{'wariant':<22}{'skany/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'błędy':>8}")
+    for r in results:
+        print(f"{r['variant']:<22}{r['scans_per_sec']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scan-to-dock (przed/po)")
+    parser.add_argument("--scans", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--docks", type=int, default=20)
+    parser.add_argument("--row-size", type=int, default=33, help="palet w jednym rzędzie (wariant batch)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,10 @@
+"""
+Powtarzalny test obciążenia ścieżki skanowania (create_pallet, scan-to-dock,
+check-pickup, login) przez ASGI - bez uvicorna i sieci.
+
+Postgres: lokalna baza po `alembic upgrade head` (DB_* jak w app.config).
+Redis: lokalny (REDIS_URL) albo `--redis fake` - fakeredis w procesie (jest w requirements.txt).
+
+    python -m benchmarks.scanner_load --scanners 20 --requests 5000 --output results.json
+    python -m benchmarks.scanner_load --output after.json --compare results.json
+"""
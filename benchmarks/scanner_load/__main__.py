@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import random
+import uuid
+
+from app.database import engine
+from app.main import app
+from benchmarks.scanner_load.report import build_report, load_report, print_report, save_report
+from benchmarks.scanner_load.seed import cleanup_warehouse, seed_warehouse
+from benchmarks.scanner_load.traffic import DEFAULT_MIX, ScannerTraffic, build_plan, parse_mix
+
+
+def use_fake_redis() -> None:
+    """Podmienia pulę połączeń współdzielonego klienta na fakeredis - instrumentacja i importy zostają."""
+    try:
+        from fakeredis import FakeServer
+        from fakeredis.aioredis import FakeRedis
+    except ImportError:
+        raise SystemExit("--redis fake wymaga pakietu fakeredis: pip install -r requirements.txt")
+
+    from app.redis_client import redis_client
+
+    redis_client.connection_pool = FakeRedis(server=FakeServer(), decode_responses=True).connection_pool
+
+
+async def main(args) -> None:
+    if args.redis == "fake":
+        use_fake_redis()
+
+    rng = random.Random(args.seed)
+    plan = build_plan(args.requests, parse_mix(args.mix), rng)
+    warehouse = await seed_warehouse(f"LOAD-{uuid.uuid4().hex[:8]}", args.docks, args.pallets, rng)
+    try:
+        traffic = ScannerTraffic(app, warehouse, rng)
+        elapsed = await traffic.run(plan, args.scanners)
+    finally:
+        await cleanup_warehouse(warehouse)
+        await engine.dispose()
+
+    params = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    report = build_report(traffic.samples, elapsed, params)
+    baseline = load_report(args.compare) if args.compare else None
+    print_report(report, baseline)
+    if args.output:
+        save_report(report, args.output)
+        print(f"Zapisano: {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test obciążenia ścieżki skanowania (ASGI w procesie)")
+    parser.add_argument("--docks", type=int, default=20)
+    parser.add_argument("--pallets", type=int, default=2000, help="palety STAGED w seedzie (pula do skanów)")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--scanners", type=int, default=20, help="równoległe skanery")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="udziały operacji, np. create=35,scan=45,pickup=15,login=5")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--redis", choices=("local", "fake"), default="local")
+    parser.add_argument("--output", help="plik JSON z wynikiem")
+    parser.add_argument("--compare", help="wcześniejszy wynik JSON do porównania")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""Podsumowanie przebiegu (RPS, percentyle, zapytania SQL), zapis JSON i porównanie z poprzednim wynikiem."""
+import json
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.scanner_load.traffic import Sample
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * pct) - 1, 0)]
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict:
+    latencies = [sample.latency for sample in samples]
+    queries = [sample.queries for sample in samples]
+    statuses: dict[str, int] = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "avg_queries": round(statistics.fmean(queries), 2),
+        "max_queries": max(queries),
+        "total_queries": sum(queries),
+        "statuses": statuses,
+    }
+
+
+def build_report(samples: list[Sample], elapsed: float, params: dict) -> dict:
+    by_operation: dict[str, list[Sample]] = {}
+    for sample in samples:
+        by_operation.setdefault(sample.operation, []).append(sample)
+    return {
+        "benchmark": "scanner_load",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "params": params,
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(samples, elapsed),
+        # RPS per operacja liczony względem czasu całego przebiegu (udział w przepustowości)
+        "operations": {
+            operation: summarize(op_samples, elapsed)
+            for operation, op_samples in sorted(by_operation.items())
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_report(report: dict, path: str) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+def load_report(path: str) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def print_report(report: dict, baseline: Optional[dict] = None) -> None:
+    print(f"commit {report['commit']}  czas {report['elapsed_s']} s  {report['params']}")
+    print(f"{'operacja':<10}{'żądania':>9}{'RPS':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'SQL/żąd.':>10}")
+    rows = [("ALL", report["overall"])] + list(report["operations"].items())
+    base_rows = {}
+    if baseline:
+        base_rows = {"ALL": baseline["overall"], **baseline["operations"]}
+
+    for name, stats in rows:
+        print(
+            f"{name:<10}{stats['requests']:>9}{stats['rps']:>9}{stats['p50_ms']:>10}"
+            f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['avg_queries']:>10}"
+        )
+        base = base_rows.get(name)
+        if base:
+            print(
+                f"{'  vs ' + str(baseline['commit']):<19}{_delta(stats['rps'], base['rps']):>9}"
+                f"{_delta(stats['p50_ms'], base['p50_ms']):>10}{_delta(stats['p95_ms'], base['p95_ms']):>10}"
+                f"{_delta(stats['p99_ms'], base['p99_ms']):>10}{_delta(stats['avg_queries'], base['avg_queries']):>10}"
+            )
+
+
+def _delta(current: float, previous: float) -> str:
+    if not previous:
+        return "-"
+    return f"{(current - previous) / previous * 100:+.0f}%"
@@ -0,0 +1,66 @@
+"""Seed magazynu do benchmarku: trasy z rampami, palety STAGED i konto skanera."""
+import random
+from dataclasses import dataclass, field
+
+from sqlalchemy import delete, insert
+
+from app.auth import get_password_hash
+from app.database import AsyncSessionLocal
+from app.models.dock import Dock
+from app.models.pallet import Pallet
+from app.models.shipment import Shipment, ShipmentStatus
+from app.models.user import User
+
+SCANNER_PASSWORD = "bench-scanner-1234"
+
+
+@dataclass
+class Warehouse:
+    prefix: str
+    username: str
+    dock_numbers: list[str] = field(default_factory=list)
+    shipment_refs: list[str] = field(default_factory=list)
+    staged_barcodes: list[str] = field(default_factory=list)
+
+
+async def seed_warehouse(prefix: str, docks: int, pallets: int, rng: random.Random) -> Warehouse:
+    """Każda rampa dostaje aktywną trasę; palety STAGED czekają na skan do rampy."""
+    warehouse = Warehouse(prefix=prefix, username=f"{prefix}-scanner")
+    async with AsyncSessionLocal() as db:
+        db.add(User(username=warehouse.username, hashed_password=get_password_hash(SCANNER_PASSWORD)))
+
+        for i in range(docks):
+            shipment = Shipment(
+                reference_number=f"{prefix}-TR-{i}",
+                origin="BENCH",
+                destination="BENCH",
+                status=ShipmentStatus.IN_PROGRESS,
+                max_weight_capacity=10**9,
+            )
+            db.add(shipment)
+            await db.flush()
+            dock = Dock(number=f"{prefix}-R-{i}", is_occupied=True, current_shipment_id=shipment.id)
+            db.add(dock)
+            warehouse.dock_numbers.append(dock.number)
+            warehouse.shipment_refs.append(shipment.reference_number)
+
+        # Palety jednym INSERT-em wielowierszowym - seed dużego magazynu nie może trwać dłużej niż pomiar
+        rows = [
+            {"barcode": f"{prefix}-P-{i}", "weight": rng.randint(100, 900)}
+            for i in range(pallets)
+        ]
+        if rows:
+            await db.execute(insert(Pallet), rows)
+        warehouse.staged_barcodes = [row["barcode"] for row in rows]
+        await db.commit()
+    return warehouse
+
+
+async def cleanup_warehouse(warehouse: Warehouse) -> None:
+    pattern = f"{warehouse.prefix}-%"
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Pallet).where(Pallet.barcode.like(pattern)))
+        await db.execute(delete(Dock).where(Dock.number.like(pattern)))
+        await db.execute(delete(Shipment).where(Shipment.reference_number.like(pattern)))
+        await db.execute(delete(User).where(User.username == warehouse.username))
+        await db.commit()
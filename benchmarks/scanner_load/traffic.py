@@ -0,0 +1,112 @@
+"""Ruch wirtualnych skanerów przez ASGI: nowe palety, skany do ramp, sprawdzanie odbioru, logowania."""
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import httpx
+
+from app.auth import create_access_token
+from benchmarks.scanner_load.seed import SCANNER_PASSWORD, Warehouse
+
+OPERATIONS = ("create", "scan", "pickup", "login")
+DEFAULT_MIX = "create=35,scan=45,pickup=15,login=5"
+
+
+@dataclass
+class Sample:
+    operation: str
+    status: int
+    latency: float
+    queries: int
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Nieznana operacja w --mix: {name} (dostępne: {', '.join(OPERATIONS)})")
+        weights[name] = int(weight)
+    return weights
+
+
+def build_plan(requests: int, mix: dict[str, int], rng: random.Random) -> list[str]:
+    """Kolejność operacji ustalona z góry z ziarna - ten sam ruch przy każdym uruchomieniu."""
+    names = list(mix)
+    return rng.choices(names, weights=[mix[name] for name in names], k=requests)
+
+
+class ScannerTraffic:
+    def __init__(self, app, warehouse: Warehouse, rng: random.Random):
+        self.app = app
+        self.warehouse = warehouse
+        self.rng = rng
+        # Palety gotowe do skanu: seed + te utworzone w trakcie przez "create"
+        self.scan_queue = deque(warehouse.staged_barcodes)
+        self.created = 0
+        self.samples: list[Sample] = []
+        token = create_access_token(data={"sub": warehouse.username})
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            # Profiler zapytań zwraca X-Query-Count dla każdego żądania
+            "X-Query-Profile": "1",
+        }
+
+    async def _request(self, client: httpx.AsyncClient, operation: str) -> tuple[str, httpx.Response]:
+        warehouse = self.warehouse
+        if operation == "create":
+            self.created += 1
+            barcode = f"{warehouse.prefix}-N-{self.created}"
+            response = await client.post(
+                "/api/pallets/",
+                json={"barcode": barcode, "weight": self.rng.randint(100, 900)},
+                headers=self.headers,
+            )
+            if response.status_code == 200:
+                self.scan_queue.append(barcode)
+            return operation, response
+
+        if operation == "scan":
+            if not self.scan_queue:
+                # Brak palet do skanu - skaner sprawdza odbiór, żeby nie zaniżać liczby żądań
+                return await self._request(client, "pickup")
+            barcode = self.scan_queue.popleft()
+            return operation, await client.post(
+                "/api/pallets/scan-to-dock",
+                json={"barcode": barcode, "dock_number": self.rng.choice(warehouse.dock_numbers)},
+                headers=self.headers,
+            )
+
+        if operation == "pickup":
+            ref_number = self.rng.choice(warehouse.shipment_refs)
+            return operation, await client.get(f"/api/shipments/check-pickup/{ref_number}", headers=self.headers)
+
+        return operation, await client.post(
+            "/api/auth/login",
+            data={"username": warehouse.username, "password": SCANNER_PASSWORD},
+            headers={"X-Query-Profile": "1"},
+        )
+
+    async def run(self, plan: list[str], scanners: int) -> float:
+        """Każdy skaner pobiera kolejną operację z planu; zwraca czas trwania całego przebiegu."""
+        operations = iter(plan)
+        transport = httpx.ASGITransport(app=self.app)
+
+        async def scanner(client: httpx.AsyncClient):
+            for operation in operations:
+                started = time.perf_counter()
+                operation, response = await self._request(client, operation)
+                self.samples.append(Sample(
+                    operation=operation,
+                    status=response.status_code,
+                    latency=time.perf_counter() - started,
+                    queries=int(response.headers.get("x-query-count", 0)),
+                ))
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(scanner(client) for _ in range(scanners)))
+            return time.perf_counter() - started
@@ -0,0 +1,175 @@
+"""
+Klucze String vs natywny UUID: rozmiary indeksów i opóźnienie zapytań ścieżki skanu
+na tym samym zbiorze danych. Buduje obie wersje tabel w osobnym schemacie
+(bench_uuid) i sprząta po sobie - nie dotyka tabel aplikacji.
+
+Wymaga lokalnego Postgresa (konfiguracja z app.database).
+
+    python -m benchmarks.uuid_keys --shipments 5000 --pallets 200000 --lookups 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.database import engine
+
+SCHEMA = "bench_uuid"
+VARIANTS = {"before (text)": "text", "after (uuid)": "uuid"}
+
+# Tabele i indeksy odpowiadają modelom; {t} = prefiks wariantu, {k} = typ kolumn kluczy
+DDL = [
+    "CREATE TABLE {s}.{t}_shipments (id {k} PRIMARY KEY, reference_number text UNIQUE NOT NULL,"
+    " status text NOT NULL, loaded_weight integer NOT NULL DEFAULT 0, max_weight_capacity integer NOT NULL,"
+    " created_at timestamptz NOT NULL DEFAULT now())",
+    "CREATE TABLE {s}.{t}_docks (id {k} PRIMARY KEY, number text UNIQUE NOT NULL, current_shipment_id {k})",
+    "CREATE TABLE {s}.{t}_pallets (id {k} PRIMARY KEY, barcode text UNIQUE NOT NULL, weight integer,"
+    " current_dock_id {k} REFERENCES {s}.{t}_docks (id), shipment_id {k} REFERENCES {s}.{t}_shipments (id),"
+    " created_at timestamptz NOT NULL DEFAULT now())",
+    "CREATE INDEX {t}_pallets_shipment_id_weight ON {s}.{t}_pallets (shipment_id) INCLUDE (weight)",
+    "CREATE INDEX {t}_pallets_current_dock_id ON {s}.{t}_pallets (current_dock_id) WHERE current_dock_id IS NOT NULL",
+    "CREATE INDEX {t}_pallets_created_at_id ON {s}.{t}_pallets (created_at, id)",
+    "CREATE INDEX {t}_docks_current_shipment_id ON {s}.{t}_docks (current_shipment_id) WHERE current_shipment_id IS NOT NULL",
+]
+
+# Dane generowane po stronie serwera z tego samego ziarna (setseed) - identyczne w obu wariantach
+SEED = [
+    "SELECT setseed(:seed)",
+    "INSERT INTO {s}.{t}_shipments (id, reference_number, status, max_weight_capacity)"
+    " SELECT md5('s' || i)::uuid::{k}, 'TR-' || i, 'IN_PROGRESS', 1000000000 FROM generate_series(1, :shipments) i",
+    "INSERT INTO {s}.{t}_docks (id, number, current_shipment_id)"
+    " SELECT md5('d' || i)::uuid::{k}, 'R-' || i, md5('s' || i)::uuid::{k} FROM generate_series(1, :docks) i",
+    "INSERT INTO {s}.{t}_pallets (id, barcode, weight, current_dock_id, shipment_id)"
+    " SELECT md5('p' || i)::uuid::{k}, 'P-' || i, 100 + (random() * 800)::int,"
+    " md5('d' || (1 + (i % :docks)))::uuid::{k}, md5('s' || (1 + (i % :shipments)))::uuid::{k}"
+    " FROM generate_series(1, :pallets) i",
+    "ANALYZE {s}.{t}_shipments, {s}.{t}_docks, {s}.{t}_pallets",
+]
+
+# Zapytania ścieżki skanu i zwolnienia rampy, w tej samej postaci co w aplikacji
+LOOKUPS = {
+    "scan_join": (
+        "SELECT p.id, d.id, s.id FROM {s}.{t}_pallets p"
+        " JOIN {s}.{t}_docks d ON d.number = :dock_number"
+        " LEFT JOIN {s}.{t}_shipments s ON s.id = d.current_shipment_id"
+        " WHERE p.barcode = :barcode"
+    ),
+    "assign_pallet": (
+        "SELECT 1 FROM {s}.{t}_pallets p JOIN {s}.{t}_shipments s ON s.id = p.shipment_id"
+        " WHERE p.id = md5('p' || :pallet)::uuid::{k}"
+    ),
+    "shipment_weight_sum": (
+        "SELECT coalesce(sum(weight), 0) FROM {s}.{t}_pallets WHERE shipment_id = md5('s' || :shipment)::uuid::{k}"
+    ),
+    "dock_by_shipment": (
+        "SELECT id FROM {s}.{t}_docks WHERE current_shipment_id = md5('s' || :shipment)::uuid::{k}"
+    ),
+}
+
+SIZES = """
+SELECT c.relname AS index_name, pg_relation_size(c.oid) AS bytes
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+WHERE n.nspname = :schema AND t.relname LIKE :prefix
+ORDER BY c.relname
+"""
+
+
+def _sql(template: str, prefix: str, key_type: str) -> str:
+    return template.format(s=SCHEMA, t=prefix, k=key_type)
+
+
+async def build(conn, prefix: str, key_type: str, args) -> None:
+    for statement in DDL:
+        await conn.execute(text(_sql(statement, prefix, key_type)))
+    params = {"seed": 0.42, "shipments": args.shipments, "docks": args.docks, "pallets": args.pallets}
+    for statement in SEED:
+        sql = _sql(statement, prefix, key_type)
+        await conn.execute(text(sql), {name: value for name, value in params.items() if f":{name}" in sql})
+
+
+async def index_sizes(conn, prefix: str) -> dict[str, int]:
+    rows = (await conn.execute(text(SIZES), {"schema": SCHEMA, "prefix": f"{prefix}_%"})).all()
+    # Nazwy bez prefiksu wariantu, żeby porównać te same indeksy
+    return {row.index_name.removeprefix(f"{prefix}_"): row.bytes for row in rows}
+
+
+async def lookup_latencies(conn, prefix: str, key_type: str, args, rng: random.Random) -> dict[str, dict]:
+    results = {}
+    for name, template in LOOKUPS.items():
+        sql = text(_sql(template, prefix, key_type))
+        latencies = []
+        for _ in range(args.lookups):
+            pallet = rng.randint(1, args.pallets)
+            shipment = rng.randint(1, args.shipments)
+            params = {
+                "barcode": f"P-{pallet}",
+                "dock_number": f"R-{rng.randint(1, args.docks)}",
+                "pallet": str(pallet),
+                "shipment": str(shipment),
+            }
+            params = {key: value for key, value in params.items() if f":{key}" in sql.text}
+            started = time.perf_counter()
+            await conn.execute(sql, params)
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        results[name] = {
+            "p50_ms": round(statistics.median(latencies) * 1000, 3),
+            "p99_ms": round(latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000, 3),
+        }
+    return results
+
+
+async def main(args) -> None:
+    report = {"params": vars(args), "variants": {}}
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+        for label, key_type in VARIANTS.items():
+            prefix = key_type
+            async with engine.begin() as conn:
+                await build(conn, prefix, key_type, args)
+            async with engine.connect() as conn:
+                report["variants"][label] = {
+                    "index_bytes": await index_sizes(conn, prefix),
+                    # To samo ziarno - identyczna sekwencja kluczy w obu wariantach
+                    "lookups": await lookup_latencies(conn, prefix, key_type, args, random.Random(args.seed)),
+                }
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+    before, after = (report["variants"][label] for label in VARIANTS)
+    print(f"{'indeks':<36}{'text KB':>10}{'uuid KB':>10}{'zmiana':>9}")
+    for name, size in before["index_bytes"].items():
+        new_size = after["index_bytes"].get(name, 0)
+        print(f"{name:<36}{size // 1024:>10}{new_size // 1024:>10}{(new_size - size) / size * 100:>+8.0f}%")
+    print(f"\n{'zapytanie':<24}{'text p50':>10}{'uuid p50':>10}{'text p99':>10}{'uuid p99':>10}")
+    for name, stats in before["lookups"].items():
+        new_stats = after["lookups"][name]
+        print(f"{name:<24}{stats['p50_ms']:>10}{new_stats['p50_ms']:>10}{stats['p99_ms']:>10}{new_stats['p99_ms']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nZapisano: {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raport przed/po: klucze String vs UUID")
+    parser.add_argument("--shipments", type=int, default=5000)
+    parser.add_argument("--docks", type=int, default=200)
+    parser.add_argument("--pallets", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=2000, help="powtórzeń każdego zapytania")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="plik JSON z raportem")
+    asyncio.run(main(parser.parse_args()))
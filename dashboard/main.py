@@ -1,3 +1,6 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 import httpx
 import pandas as pd
@@ -7,32 +10,66 @@ st.set_page_config(page_title="LogTech Dashboard", layout="wide")
 st.title("🚚 Smart Logistics - Real-time Monitor")
 
 BASE_URL = "http://127.0.0.1:8000"
-
-# Funkcja do pobierania danych z FastAPI
+# Jak długo wyniki z API są współdzielone między odświeżeniami i kartami przeglądarki
+CACHE_TTL = 5
+
+# Endpointy potrzebne do jednego renderu - pobierane równolegle
+DASHBOARD_ENDPOINTS = {
+    "docks": "/docks/",
+    "load_summary": "/shipments/load-summary?status=COLLECTED",
+    "recent_pallets": "/pallets/?limit=10&order=desc",
+    "audit": "/shipments/ai-audit",
+}
+
+# Jeden klient HTTP z pulą połączeń (keep-alive) na cały proces Streamlita
+@st.cache_resource
+def get_client():
+    return httpx.Client(
+        base_url=BASE_URL,
+        timeout=5.0,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+    )
+
+# Funkcja do pobierania danych z FastAPI - zwraca (dane, błąd), bo działa też w wątkach
 def get_data(endpoint, timeout=5.0):
     try:
-        response = httpx.get(f"{BASE_URL}{endpoint}", timeout=timeout)
-        # Sprawdzamy, czy status jest OK (200)
-        if response.status_code == 200:
-            return response.json()
+        response = get_client().get(endpoint, timeout=timeout)
+        # Sprawdzamy, czy status jest OK (2xx)
+        if response.is_success:
+            return response.json(), None
         else:
-            st.error(f"API zwróciło błąd {response.status_code} dla {endpoint}")
-            return [] # Zwracamy pustą listę zamiast None
+            return [], f"API zwróciło błąd {response.status_code} dla {endpoint}" # Zwracamy pustą listę zamiast None
     except Exception as e:
-        st.error(f"Błąd połączenia: {e}")
-        return [] # Zwracamy pustą listę w przypadku awarii
+        return [], f"Błąd połączenia: {e}" # Zwracamy pustą listę w przypadku awarii
+
+# Wszystkie dane dashboardu naraz; wynik współdzielony przez CACHE_TTL sekund między kartami
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_dashboard_data():
+    with ThreadPoolExecutor(max_workers=len(DASHBOARD_ENDPOINTS)) as pool:
+        futures = {name: pool.submit(get_data, endpoint) for name, endpoint in DASHBOARD_ENDPOINTS.items()}
+        return {name: future.result() for name, future in futures.items()}
 
 # Funkcja realizująca zadanie z FastAPI
 def post_data(endpoint):
     """Uniwersalna funkcja do wysyłania komend do API (POST)"""
     try:
-        response = httpx.post(f"{BASE_URL}{endpoint}")
+        response = get_client().post(endpoint)
         if response.status_code == 200:
             return True, response.json()
         else:
             return False, f"Błąd API: {response.status_code}"
     except Exception as e:
         return False, str(e)
+
+fetch_started = time.perf_counter()
+dashboard_data = fetch_dashboard_data()
+section_times = {"Pobranie danych": time.perf_counter() - fetch_started}
+
+def section_data(name):
+    data, error = dashboard_data[name]
+    if error:
+        st.error(error)
+    return data
         
 # --- SIDEBAR: Statystyki Ogólne ---
 st.sidebar.header("System Status")
@@ -42,47 +79,43 @@ st.sidebar.info(f"Ostatnia aktualizacja: {pd.Timestamp.now().strftime('%H:%M:%S'
 # --- KOLUMNA 1: Zajętość Ramp ---
 col1, col2 = st.columns(2)
 
+section_started = time.perf_counter()
 with col1:
     st.subheader("🏢 Status Ramp (Docks)")
-    docks = get_data("/docks/")
+    docks = section_data("docks")
     if docks:
         for dock in docks:
             status_color = "🔴 Zajęta" if dock['is_occupied'] else "🟢 Wolna"
             st.info(f"**Rampa {dock['number']}** | Typ: {dock['dock_type']} | Status: {status_color}")
     else:
         st.warning("Brak skonfigurowanych ramp.")
+section_times["Rampy"] = time.perf_counter() - section_started
 
 # --- KOLUMNA 2: Weight Guard Monitor ---
+section_started = time.perf_counter()
 with col2:
     st.subheader("⚖️ Załadunek Tras (Weight Guard)")
-    all_shipments = get_data("/shipments/")
-    loading_shipments = [s for s in all_shipments if s['status'] in ['LOADING', 'IN_PROGRESS']]
 
     # Sekcja 2: Twoja kluczowa sekcja - WERYFIKACJA ODBIORU (Ghost Pickup Prevention)
-    pickup_verification = [s for s in all_shipments if s['status'] == 'COLLECTED']
+    # Jedno zapytanie: API zwraca wagę, liczbę palet i % wypełnienia dla każdej trasy
+    pickup_verification = section_data("load_summary")
 
     if pickup_verification:
         for ship in pickup_verification:
-            # Tu możemy pobrać palety dla danej trasy
-            pallets = get_data("/pallets/")
-            current_weight = sum(p.get('weight') or 0 for p in pallets if p.get('shipment_id') == ship['id'])
-            max_cap = ship.get('max_weight_capacity') or 12000 
-            
-            percent = min(current_weight / max_cap, 1.0) if max_cap > 0 else 0
+            percent = min(ship['fill_percent'] / 100, 1.0)
             
             st.write(f"**Trasa: {ship['reference_number']}** ({ship['origin']} -> {ship['destination']})")
             st.progress(percent)
-            st.caption(f"Waga: {current_weight}kg / {max_cap}kg ({(percent*100):.1f}%)")
+            st.caption(f"Waga: {ship['loaded_weight']}kg / {ship['max_weight_capacity']}kg ({ship['fill_percent']:.1f}%) | Palety: {ship['pallet_count']}")
     else:
         st.write("Brak aktywnych tras.")
+section_times["Weight Guard"] = time.perf_counter() - section_started
 
 st.divider()
 st.subheader("🚚 Zarządzanie Odjazdami")
+section_started = time.perf_counter()
 
-# Pobieramy trasy, które są w trakcie ładowania (zakładając, że masz taką listę)
-# Jeśli nie, możemy pobrać wszystkie aktywne doki
-docks = get_data("/docks/") # Twoja funkcja pobierająca dane
-
+# Rampy z tego samego pobrania co kolumna 1 - bez drugiego zapytania o /docks/
 occupied_docks = [d for d in docks if d['is_occupied'] and d['current_shipment_id']]
 
 if not occupied_docks:
@@ -99,27 +132,62 @@ else:
                 
                 if success:
                     st.success(f"Rampa {d['number']} została pomyślnie zwolniona!")
+                    fetch_dashboard_data.clear()
                     st.rerun()
                 else:
                     st.error(f"Nie udało się zwolnić rampy: {message}")
 
+section_times["Odjazdy"] = time.perf_counter() - section_started
+
 # --- TABELA: Ostatnie Palety ---
 st.divider()
 st.subheader("📦 Ostatnio zeskanowane palety")
-pallets_data = get_data("/pallets/")
+section_started = time.perf_counter()
+pallets_data = section_data("recent_pallets")
 if pallets_data:
     df = pd.DataFrame(pallets_data)
-    st.table(df[['barcode', 'status', 'weight', 'created_at']].tail(10))
+    st.table(df[['barcode', 'status', 'weight', 'created_at']])
+section_times["Palety"] = time.perf_counter() - section_started
 
 # --- SEKCJA: AUDYT STRATEGICZNY AI ---
 st.divider()
 st.subheader("🤖 Audyt Magazynu (Llama)")
+section_started = time.perf_counter()
+
+# Ostatni audyt przygotowany w tle przez API - bez czekania na model
+latest_audit = section_data("audit")
+if latest_audit and latest_audit.get('warehouse_health_check'):
+    st.info(latest_audit['warehouse_health_check'])
+    st.caption(f"Analiza wygenerowana: {latest_audit.get('timestamp')}")
+elif latest_audit:
+    st.caption("Audyt w przygotowaniu - odśwież stronę za chwilę.")
+
 if st.button('Uruchom Audyt AI'):
-    with st.spinner('Llama 3 analizuje dane...'):
-        audit_data = get_data("/shipments/ai-audit", timeout=60.0)
-        
-        if audit_data and 'warehouse_health_check' in audit_data:
-            st.info(audit_data['warehouse_health_check'])
-            st.caption(f"Analiza wygenerowana: {audit_data.get('timestamp')}")
-        else:
-            st.error("Nie udało się pobrać audytu AI.")
\ No newline at end of file
+    # Strumień SSE - tekst audytu dopisywany na bieżąco, zamiast spinnera na całą generację
+    placeholder = st.empty()
+    report = ""
+    try:
+        with get_client().stream("GET", "/shipments/ai-audit/stream", timeout=60.0) as response:
+            event = "message"
+            for line in response.iter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+                    if event == "error":
+                        st.error(f"Nie udało się pobrać audytu AI: {data.get('detail')}")
+                    elif event == "message":
+                        report += data.get("text", "")
+                        placeholder.info(report)
+                elif not line:
+                    event = "message"
+        if report:
+            st.caption(f"Analiza wygenerowana: {pd.Timestamp.now().strftime('%H:%M:%S')}")
+    except Exception as e:
+        st.error(f"Nie udało się pobrać audytu AI: {e}")
+section_times["Audyt AI"] = time.perf_counter() - section_started
+
+# --- SIDEBAR: Czasy renderowania sekcji ---
+st.sidebar.subheader("⏱️ Czas renderowania")
+for section, seconds in section_times.items():
+    st.sidebar.caption(f"{section}: {seconds * 1000:.0f} ms")
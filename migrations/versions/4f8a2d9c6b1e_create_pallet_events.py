@@ -0,0 +1,45 @@
+"""create pallet events
+
+Revision ID: 4f8a2d9c6b1e
+Revises: b7d2c4e81f3a
+Create Date: 2026-10-18 14:05:37.662480
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8a2d9c6b1e'
+down_revision: Union[str, None] = 'b7d2c4e81f3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tabela nadrzędna bez danych; dzienne partycje tworzy i odłącza app.services.pallet_events
+    op.create_table('pallet_events',
+    sa.Column('event_id', sa.String(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('pallet_id', sa.UUID(), nullable=True),
+    sa.Column('barcode', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('weight', sa.Integer(), nullable=True),
+    sa.Column('dock_id', sa.UUID(), nullable=True),
+    sa.Column('dock_number', sa.String(), nullable=True),
+    sa.Column('shipment_id', sa.UUID(), nullable=True),
+    sa.PrimaryKeyConstraint('event_id', 'occurred_at'),
+    postgresql_partition_by='RANGE (occurred_at)',
+    )
+    op.create_index('ix_pallet_events_barcode_occurred_at', 'pallet_events', ['barcode', 'occurred_at'], unique=False)
+    op.create_index('ix_pallet_events_dock_number_occurred_at', 'pallet_events', ['dock_number', 'occurred_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Usuwa też wszystkie dołączone partycje
+    op.drop_index('ix_pallet_events_dock_number_occurred_at', table_name='pallet_events')
+    op.drop_index('ix_pallet_events_barcode_occurred_at', table_name='pallet_events')
+    op.drop_table('pallet_events')
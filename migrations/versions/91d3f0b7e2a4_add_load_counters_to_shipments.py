@@ -0,0 +1,42 @@
+"""add load counters to shipments
+
+Revision ID: 91d3f0b7e2a4
+Revises: 7c6ac76a4c2f
+Create Date: 2026-10-18 10:03:17.226904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '91d3f0b7e2a4'
+down_revision: Union[str, None] = '7c6ac76a4c2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('shipments', sa.Column('loaded_weight', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('shipments', sa.Column('pallet_count', sa.Integer(), server_default='0', nullable=False))
+    # Wypełnienie liczników dla istniejących tras
+    op.execute(
+        """
+        UPDATE shipments s
+        SET loaded_weight = agg.loaded_weight, pallet_count = agg.pallet_count
+        FROM (
+            SELECT shipment_id, COALESCE(SUM(weight), 0) AS loaded_weight, COUNT(*) AS pallet_count
+            FROM pallets
+            WHERE shipment_id IS NOT NULL
+            GROUP BY shipment_id
+        ) agg
+        WHERE s.id = agg.shipment_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('shipments', 'pallet_count')
+    op.drop_column('shipments', 'loaded_weight')
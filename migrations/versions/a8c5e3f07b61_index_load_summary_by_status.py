@@ -0,0 +1,38 @@
+"""index load summary by status
+
+Revision ID: a8c5e3f07b61
+Revises: c3e9f1a7d254
+Create Date: 2026-10-18 17:08:41.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c5e3f07b61'
+down_revision: Union[str, None] = 'c3e9f1a7d254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # load-summary?status=... (dashboard: COLLECTED) - równość po statusie, kolejność (created_at, id) z indeksu.
+        # Częściowy indeks aktywnych tras nie pasował do żadnego zapytania
+        op.create_index(
+            'ix_shipments_status_created_at_id', 'shipments', ['status', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+        op.drop_index('ix_shipments_active_created_at_id', table_name='shipments', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_shipments_active_created_at_id', 'shipments', ['created_at', 'id'],
+            unique=False, postgresql_where=sa.text("status IN ('PENDING', 'IN_PROGRESS')"), postgresql_concurrently=True,
+        )
+        op.drop_index('ix_shipments_status_created_at_id', table_name='shipments', postgresql_concurrently=True)
@@ -0,0 +1,132 @@
+"""native uuid keys
+
+Revision ID: b7d2c4e81f3a
+Revises: e19b9451b358
+Create Date: 2026-10-18 12:41:53.907116
+
+Klucze String -> UUID bez przepisywania tabel pod ACCESS EXCLUSIVE (expand/contract):
+1. nowe kolumny *_uuid + trigger utrzymujący je przy zapisach starej wersji aplikacji,
+2. backfill paczkami w osobnych transakcjach,
+3. indeksy CONCURRENTLY i CHECK NOT NULL walidowany bez blokady zapisów,
+4. krótka zamiana kolumn pod lock_timeout,
+5. walidacja kluczy obcych (SHARE UPDATE EXCLUSIVE - zapisy idą dalej).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2c4e81f3a'
+down_revision: Union[str, None] = 'e19b9451b358'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10_000
+
+# tabela -> kolumny kluczy (PK + FK) do przejścia na UUID
+KEY_COLUMNS = {
+    'shipments': ['id'],
+    'docks': ['id', 'current_shipment_id'],
+    'pallets': ['id', 'current_dock_id', 'shipment_id'],
+}
+
+FOREIGN_KEYS = [
+    ('pallets_current_dock_id_fkey', 'pallets', 'current_dock_id', 'docks'),
+    ('pallets_shipment_id_fkey', 'pallets', 'shipment_id', 'shipments'),
+]
+
+# Indeksy zawierające kolumny kluczy - budowane od nowa na kolumnach *_uuid
+SECONDARY_INDEXES = [
+    ('ix_pallets_created_at_id', 'pallets', '(created_at, id_uuid)', ''),
+    ('ix_pallets_shipment_id_weight', 'pallets', '(shipment_id_uuid) INCLUDE (weight)', ''),
+    ('ix_pallets_current_dock_id', 'pallets', '(current_dock_id_uuid)', 'WHERE current_dock_id_uuid IS NOT NULL'),
+    ('ix_docks_current_shipment_id', 'docks', '(current_shipment_id_uuid)', 'WHERE current_shipment_id_uuid IS NOT NULL'),
+    ('ix_shipments_created_at_id', 'shipments', '(created_at, id_uuid)', ''),
+    ('ix_shipments_active_created_at_id', 'shipments', '(created_at, id_uuid)', "WHERE status IN ('PENDING', 'IN_PROGRESS')"),
+]
+
+
+def upgrade() -> None:
+    # 1. Nowe kolumny (bez wartości domyślnej - tylko zmiana katalogu) i trigger synchronizujący
+    for table, columns in KEY_COLUMNS.items():
+        for column in columns:
+            op.add_column(table, sa.Column(f'{column}_uuid', sa.UUID(), nullable=True))
+        assignments = '\n'.join(f'    NEW.{column}_uuid := NEW.{column}::uuid;' for column in columns)
+        op.execute(f"""
+CREATE FUNCTION {table}_uuid_sync() RETURNS trigger AS $$
+BEGIN
+{assignments}
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+""")
+        op.execute(
+            f'CREATE TRIGGER {table}_uuid_sync BEFORE INSERT OR UPDATE ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION {table}_uuid_sync()'
+        )
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+
+        # 2. Backfill paczkami - każda paczka to krótka transakcja, skany nie czekają na całą tabelę
+        for table, columns in KEY_COLUMNS.items():
+            assignments = ', '.join(f'{column}_uuid = {column}::uuid' for column in columns)
+            while True:
+                result = bind.execute(sa.text(
+                    f'UPDATE {table} SET {assignments} '
+                    f'WHERE ctid = ANY(ARRAY(SELECT ctid FROM {table} WHERE id_uuid IS NULL LIMIT {BATCH_SIZE}))'
+                ))
+                if result.rowcount == 0:
+                    break
+
+        # 3. Indeksy na nowych kolumnach i NOT NULL potwierdzony CHECK-iem walidowanym online
+        for table in KEY_COLUMNS:
+            op.execute(f'CREATE UNIQUE INDEX CONCURRENTLY {table}_id_uuid_key ON {table} (id_uuid)')
+            op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_id_uuid_not_null CHECK (id_uuid IS NOT NULL) NOT VALID')
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {table}_id_uuid_not_null')
+        for name, table, columns, where in SECONDARY_INDEXES:
+            op.execute(f'CREATE INDEX CONCURRENTLY {name}_uuid ON {table} {columns} {where}')
+
+    # 4. Zamiana kolumn - jedna krótka transakcja; lock_timeout zamiast kolejki za długimi transakcjami
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    for name, table, _, _ in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+    for table, columns in KEY_COLUMNS.items():
+        op.execute(f'DROP TRIGGER {table}_uuid_sync ON {table}')
+        op.execute(f'DROP FUNCTION {table}_uuid_sync()')
+        # SET NOT NULL bez skanu tabeli - Postgres korzysta z zwalidowanego CHECK
+        op.alter_column(table, 'id_uuid', nullable=False)
+        op.drop_constraint(f'{table}_id_uuid_not_null', table, type_='check')
+        # Usunięcie starych kolumn zabiera ich indeksy (w tym PK)
+        for column in columns:
+            op.drop_column(table, column)
+            op.alter_column(table, f'{column}_uuid', new_column_name=column)
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY USING INDEX {table}_id_uuid_key')
+    for name, table, _, _ in SECONDARY_INDEXES:
+        op.execute(f'ALTER INDEX {name}_uuid RENAME TO {name}')
+    for name, table, column, referred in FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {referred} (id) NOT VALID')
+
+    # 5. Walidacja FK bez blokowania zapisów
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in FOREIGN_KEYS:
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+
+def downgrade() -> None:
+    # Powrót do String przepisuje tabele pod blokadą - tylko na oknie serwisowym
+    for name, table, _, _ in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+    for table, columns in KEY_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=sa.String(),
+                existing_type=sa.UUID(),
+                postgresql_using=f'{column}::text',
+            )
+    for name, table, column, referred in FOREIGN_KEYS:
+        op.create_foreign_key(name, table, referred, [column], ['id'])
@@ -0,0 +1,50 @@
+"""add hot lookup indexes
+
+Revision ID: e19b9451b358
+Revises: 91d3f0b7e2a4
+Create Date: 2026-10-18 11:26:04.318552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e19b9451b358'
+down_revision: Union[str, None] = '91d3f0b7e2a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY - bez blokowania zapisów (skany) na czas budowy; wymaga wyjścia z transakcji
+    with op.get_context().autocommit_block():
+        # SUM(weight) po trasie jako Index Only Scan; obsługuje też zwykłe wyszukiwanie po shipment_id
+        op.create_index(
+            'ix_pallets_shipment_id_weight', 'pallets', ['shipment_id'],
+            unique=False, postgresql_include=['weight'], postgresql_concurrently=True,
+        )
+        # Częściowe: palety STAGED (bez rampy) i wolne rampy nie trafiają do indeksu
+        op.create_index(
+            'ix_pallets_current_dock_id', 'pallets', ['current_dock_id'],
+            unique=False, postgresql_where=sa.text('current_dock_id IS NOT NULL'), postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_docks_current_shipment_id', 'docks', ['current_shipment_id'],
+            unique=False, postgresql_where=sa.text('current_shipment_id IS NOT NULL'), postgresql_concurrently=True,
+        )
+        # Aktywne trasy w kolejności stronicowania - zestawienia załadunku bez przeglądania archiwum
+        op.create_index(
+            'ix_shipments_active_created_at_id', 'shipments', ['created_at', 'id'],
+            unique=False, postgresql_where=sa.text("status IN ('PENDING', 'IN_PROGRESS')"), postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_shipments_active_created_at_id', table_name='shipments', postgresql_concurrently=True)
+        op.drop_index('ix_docks_current_shipment_id', table_name='docks', postgresql_concurrently=True)
+        op.drop_index('ix_pallets_current_dock_id', table_name='pallets', postgresql_concurrently=True)
+        op.drop_index('ix_pallets_shipment_id_weight', table_name='pallets', postgresql_concurrently=True)